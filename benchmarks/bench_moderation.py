@@ -0,0 +1,257 @@
+"""
+benchmarks for Breeze's moderation hot path, runs offline without a server
+
+    python benchmarks/bench_moderation.py
+    python benchmarks/bench_moderation.py --messages 5000 --json results.json
+    python benchmarks/bench_moderation.py --compare old.json --json new.json
+
+reports throughput (messages/sec), p50/p99 latency and peak memory per benchmark,
+and can save everything as JSON to compare against another version later. the ML
+(profanity-check) benchmarks are skipped if alt-profanity-check isn't installed
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+try:
+    import endstone_breeze  # noqa: F401
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import corpus  # noqa: E402
+from endstone_breeze.utils import (  # noqa: E402
+    FuzzyIndex,
+    ModerationPipeline,
+    ProfanityCheck,
+    ProfanityExtraList,
+    ProfanityList,
+    SpamDetector,
+    bounded_levenshtein,
+    levenshtein,
+    split_into_tokens,
+    tokenize_spans,
+)
+from endstone_breeze.utils.profanity_utils import get_predict, warm_up  # noqa: E402
+
+
+def _ml_available() -> bool:
+    try:
+        get_predict()
+    except ImportError:
+        return False
+    return True
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentile(sorted_values: list[int], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func: Callable[[str], object], inputs: list[str], memory_sample: int = 200) -> dict[str, float]:
+    """time `func` over every input, then run a smaller sample under tracemalloc for peak memory"""
+    for item in inputs[:20]:  # warm caches and lazy loading
+        func(item)
+
+    latencies = []
+    start = time.perf_counter()
+    for item in inputs:
+        t = time.perf_counter_ns()
+        func(item)
+        latencies.append(time.perf_counter_ns() - t)
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for item in inputs[:memory_sample]:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "count": len(inputs),
+        "messages_per_sec": len(inputs) / total if total else 0.0,
+        "mean_us": statistics.fmean(latencies) / 1000 if latencies else 0.0,
+        "p50_us": _percentile(latencies, 0.50) / 1000,
+        "p99_us": _percentile(latencies, 0.99) / 1000,
+        "peak_memory_kib": peak / 1024,
+    }
+
+
+def _custom_word_list(size: int, seed: int) -> set[str]:
+    """community-style blacklist: variants of the profane words with swapped, doubled and leet letters"""
+    rng = random.Random(seed)
+    words: set[str] = set()
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789"
+    while len(words) < size:
+        word = list(rng.choice(corpus.PROFANE_WORDS))
+        for _ in range(rng.randint(1, 3)):
+            i = rng.randrange(len(word))
+            word[i] = rng.choice(alphabet) if rng.random() < 0.5 else word[i] * 2
+        words.add("".join(word))
+    return words
+
+
+def build_benchmarks(messages: list[str], ml: bool, word_list_size: int, seed: int) -> dict[str, Callable[[str], object]]:
+    pl = ProfanityList()
+    pe = ProfanityExtraList()
+    pc = ProfanityCheck()
+    # the filters get no token caches so repeated words don't hide the real per-message cost
+    pl.token_cache = None
+    pe.token_cache = None
+    pipeline = ModerationPipeline(profanity_check=pc, extra_list=pe, long_list=pl)
+
+    words = [w for message in messages for w in split_into_tokens(message) if w.isalnum()]
+    rng = random.Random(seed)
+    pairs = [(rng.choice(words), rng.choice(corpus.PROFANE_WORDS)) for _ in range(len(messages))]
+    pair_inputs = [f"{a}\0{b}" for a, b in pairs]
+    word_list = frozenset(_custom_word_list(word_list_size, seed))
+    spam_detector = SpamDetector()
+    players = [f"player{i}" for i in range(50)]
+
+    benchmarks: dict[str, Callable[[str], object]] = {
+        "tokenizer/split_into_tokens": split_into_tokens,
+        "tokenizer/tokenize_spans": tokenize_spans,
+        "levenshtein/full": lambda pair: levenshtein(*pair.split("\0")),
+        "levenshtein/bounded": lambda pair: bounded_levenshtein(*pair.split("\0"), 3),
+        "filter/Longlist.is_profane": pl.is_profane,
+        "filter/Longlist.censor": pl.censor,
+        "filter/Extralist.is_profane": pe.is_profane,
+        "filter/Extralist.censor": pe.censor,
+        "pipeline/lists_only": lambda m: pipeline.check_and_censor(m, {"Profanity-check": False}),
+        "pipeline/Extralist_only": lambda m: pipeline.check_and_censor(m, {"Profanity-check": False, "Longlist": False}),
+        "pipeline/Longlist_only": lambda m: pipeline.check_and_censor(m, {"Profanity-check": False, "Extralist": False}),
+        f"pipeline/censor_with_word_list_{len(word_list)}": lambda m: pipeline.censor_with_word_list(m, word_list),
+        "spam/SpamDetector.check": lambda m: spam_detector.check(rng.choice(players), m),
+    }
+    # the fuzzy index on its own, every token of the message (no allow lists in front of it) at
+    # a few list sizes, to see how the lookup grows with the list
+    for size in sorted({1000, 10000, word_list_size}):
+        index = FuzzyIndex(_custom_word_list(size, seed))
+        benchmarks[f"fuzzy/FuzzyIndex.matches_{size}"] = lambda m, index=index: [index.matches(t) for t in split_into_tokens(m)]
+    if ml:
+        benchmarks.update({
+            "filter/Profanity-check.is_profane": pc.is_profane,
+            "filter/Profanity-check.censor": pc.censor,
+            "pipeline/all_checks": pipeline.check_and_censor,
+        })
+
+    # pair benchmarks take their own inputs
+    benchmarks["levenshtein/full"].inputs = pair_inputs  # type: ignore[attr-defined]
+    benchmarks["levenshtein/bounded"].inputs = pair_inputs  # type: ignore[attr-defined]
+    return benchmarks
+
+
+def _breeze_text_processing_benchmarks(ml: bool) -> dict[str, Callable[[str], object]]:
+    """BreezeTextProcessing lives in the plugin module, which needs endstone installed"""
+    try:
+        from endstone_breeze.breeze import BreezeTextProcessing
+    except ImportError:
+        return {}
+
+    checks = None if ml else {"Profanity-check": False}
+    cached = BreezeTextProcessing()
+    uncached = BreezeTextProcessing(cache_size=0)
+    return {
+        "BreezeTextProcessing/check_and_censor_cached": lambda m: cached.check_and_censor(m, checks),
+        "BreezeTextProcessing/check_and_censor_uncached": lambda m: uncached.check_and_censor(m, checks),
+    }
+
+
+def compare(old: dict, new: dict) -> None:
+    print(f"\n{'benchmark':<48} {'old msg/s':>12} {'new msg/s':>12} {'speedup':>8} {'p99 old':>10} {'p99 new':>10}")
+    for name, result in new["results"].items():
+        previous = old["results"].get(name)
+        if previous is None:
+            continue
+        speedup = result["messages_per_sec"] / previous["messages_per_sec"] if previous["messages_per_sec"] else 0.0
+        print(
+            f"{name:<48} {previous['messages_per_sec']:>12.0f} {result['messages_per_sec']:>12.0f} "
+            f"{speedup:>7.2f}x {previous['p99_us']:>9.0f}us {result['p99_us']:>9.0f}us"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="benchmark Breeze's moderation hot path")
+    parser.add_argument("--messages", type=int, default=2000, help="number of synthetic chat messages")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic corpus")
+    parser.add_argument("--word-list-size", type=int, default=2000, help="size of the custom word list benchmark")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--json", type=Path, help="save the results to this file")
+    parser.add_argument("--compare", type=Path, help="results file of another version to compare against")
+    args = parser.parse_args(argv)
+
+    ml = _ml_available()
+    start = time.perf_counter()
+    load_timings = warm_up() if ml else {}
+    load_seconds = time.perf_counter() - start
+
+    messages = corpus.generate(args.messages, seed=args.seed)
+    benchmarks = build_benchmarks(messages, ml, args.word_list_size, args.seed)
+    benchmarks.update(_breeze_text_processing_benchmarks(ml))
+    for category in corpus.CATEGORIES:
+        pipeline = ModerationPipeline()
+        checks = None if ml else {"Profanity-check": False}
+        bench = lambda m, pipeline=pipeline, checks=checks: pipeline.check_and_censor(m, checks)  # noqa: E731
+        bench.inputs = corpus.generate_category(category, max(100, args.messages // 10), seed=args.seed)  # type: ignore[attr-defined]
+        benchmarks[f"corpus/{category}"] = bench
+
+    results = {}
+    for name, func in benchmarks.items():
+        if args.filter and args.filter not in name:
+            continue
+        result = measure(func, getattr(func, "inputs", messages))
+        results[name] = result
+        print(
+            f"{name:<48} {result['messages_per_sec']:>10.0f} msg/s  p50 {result['p50_us']:>8.1f}us  "
+            f"p99 {result['p99_us']:>8.1f}us  peak {result['peak_memory_kib']:>8.1f}KiB"
+        )
+
+    output = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "messages": args.messages,
+            "seed": args.seed,
+            "ml_available": ml,
+            "warm_up_seconds": load_seconds,
+            "load_timings": load_timings,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    if args.json:
+        args.json.write_text(json.dumps(output, indent=2))
+        print(f"\nsaved results to {args.json}")
+
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
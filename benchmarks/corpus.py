@@ -0,0 +1,94 @@
+"""
+synthetic chat corpus for the moderation benchmarks
+
+every generator is seeded, so the same seed always gives the same messages
+and results can be compared between versions
+"""
+
+import random
+
+CLEAN_WORDS = (
+    "gg lol tp me pls anyone want to trade diamonds where is the base i found a village "
+    "nice build bro can someone help me with the farm brb afk back wait for me "
+    "thanks good game see you tomorrow what time is it the nether portal is over here "
+    "who has iron armor lets go mining this server is awesome hello hi hey yo"
+).split()
+
+PROFANE_WORDS = ("fuck", "shit", "bitch", "ass", "asshole", "damn", "bastard", "dick")
+
+LEET = str.maketrans({"a": "4", "e": "3", "i": "1", "o": "0", "s": "5", "t": "7"})
+
+NON_LATIN = (
+    "привет как дела",
+    "こんにちは 元気ですか",
+    "مرحبا كيف حالك",
+    "안녕하세요 반갑습니다",
+    "γεια σου τι κάνεις",
+    "olá tudo bem você",
+)
+
+
+def _clean(rng: random.Random) -> str:
+    return " ".join(rng.choice(CLEAN_WORDS) for _ in range(rng.randint(1, 12)))
+
+
+def _with_profanity(rng: random.Random, word: str) -> str:
+    words = [rng.choice(CLEAN_WORDS) for _ in range(rng.randint(1, 10))]
+    words.insert(rng.randint(0, len(words)), word)
+    return " ".join(words)
+
+
+def _profane(rng: random.Random) -> str:
+    return _with_profanity(rng, rng.choice(PROFANE_WORDS))
+
+
+def _leetspeak(rng: random.Random) -> str:
+    return _with_profanity(rng, rng.choice(PROFANE_WORDS).translate(LEET))
+
+
+def _spaced_out(rng: random.Random) -> str:
+    word = rng.choice(PROFANE_WORDS)
+    return _with_profanity(rng, rng.choice(".*>-_ ").join(word))
+
+
+def _long_spam(rng: random.Random) -> str:
+    chunk = rng.choice(("JOIN MY SERVER ", "free diamonds at spawn!!! ", "lolololol ", _clean(rng) + " "))
+    return (chunk * rng.randint(5, 20))[:256]
+
+
+def _non_latin(rng: random.Random) -> str:
+    return " ".join(rng.choice(NON_LATIN) for _ in range(rng.randint(1, 3)))
+
+
+CATEGORIES = {
+    "clean": _clean,
+    "profane": _profane,
+    "leetspeak": _leetspeak,
+    "spaced_out": _spaced_out,
+    "long_spam": _long_spam,
+    "non_latin": _non_latin,
+}
+
+# roughly what a busy server's chat looks like: mostly clean, some of everything else
+DEFAULT_MIX = {
+    "clean": 0.70,
+    "profane": 0.10,
+    "leetspeak": 0.05,
+    "spaced_out": 0.05,
+    "long_spam": 0.05,
+    "non_latin": 0.05,
+}
+
+
+def generate(count: int, seed: int = 0, mix: dict[str, float] | None = None) -> list[str]:
+    """generate `count` messages, picking categories by the weights in `mix`"""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    return [CATEGORIES[rng.choices(names, weights)[0]](rng) for _ in range(count)]
+
+
+def generate_category(category: str, count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [CATEGORIES[category](rng) for _ in range(count)]
@@ -7,7 +7,6 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from extensions import BreezeTextProcessing, PlayerDataManager, BreezeExtensionAPI #type: ignore
 
-import time
 from random import randint
 
 # handlers must have a handler function
@@ -19,18 +18,27 @@ def handler(handler_input: "BreezeExtensionAPI.HandlerInput", player_data_manage
     sender_uuid = str(handler_input["player"].unique_id)
     finished_message = handler_input["message"]
 
-    local_player_data = player_data_manager.get_player_data(handler_input["player"].name)
     is_bad = False # set to true if the message may violate your rules
     fully_cancel_message = (False, "") # first element is whether to fully cancel the message (i.e., not send it at all), /
     # second element is the reason. it is unused internally but you can use it yourself. will get stored in the handleroutput
     should_check_message = True # weather to check the message or not. set to false to skip checking
     caught = [] # list of what methods to check the message was caught by. great for debugging if you're layering different filtering methods
 
-    # spam check
-    if time.monotonic() - local_player_data["latest_time_a_message_was_sent"] < 0.5:
-        fully_cancel_message = (True, "messages sent too quickly")
+    # spam check, before any filtering. the limits are set in the rate_limit section of the config
+    rate_limit = player_data_manager.rate_limiter.check(sender_uuid)
+    if not rate_limit.allowed:
+        fully_cancel_message = (True, f"messages sent too quickly ({rate_limit.limit})")
         should_check_message = False
-        handler_input["player"].send_message("You're sending messages too fast!")
+        if rate_limit.limit == "global": # the whole server is chatting too much (e.g. a raid)
+            handler_input["player"].send_message("Chat is busy right now, please try again")
+        else:
+            handler_input["player"].send_message("You're sending messages too fast!")
+    elif player_data_manager.spam_detector is not None: # drop copy-pasted spam (None if disabled in the config)
+        spam = player_data_manager.spam_detector.check(sender_uuid, handler_input["message"])
+        if spam.is_spam:
+            fully_cancel_message = (True, f"spam ({spam.scope})")
+            should_check_message = False
+            handler_input["player"].send_message("Please don't spam the same message!")
 
     if fully_cancel_message[0]:
         should_check_message = False
@@ -38,7 +46,7 @@ def handler(handler_input: "BreezeExtensionAPI.HandlerInput", player_data_manage
     if should_check_message:
         finished_message, is_bad, caught = breeze_text_processing.check_and_censor(handler_input["message"])
 
-    player_data_manager.update_player_data(handler_input["player"].name, handler_input["message"])
+    player_data_manager.update_player_data(sender_uuid, handler_input["message"])
 
     return {
         "is_bad": is_bad,
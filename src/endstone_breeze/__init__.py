@@ -1,3 +1,16 @@
-from .breeze import Breeze
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .breeze import Breeze
 
 __all__ = ["Breeze"]
+
+
+def __getattr__(name: str):
+    # the plugin needs endstone, so it's only imported when it's asked for.
+    # that way endstone_breeze.utils can be used offline (benchmarks, log re-scans)
+    if name == "Breeze":
+        from .breeze import Breeze
+
+        return Breeze
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
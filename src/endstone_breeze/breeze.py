@@ -11,68 +11,142 @@ from endstone.event import (
 from endstone.plugin import Plugin
 import endstone
 from importlib.resources import files
-from .utils.profanity_utils import ProfanityCheck, ProfanityList, ProfanityExtraList
-from .utils.general_utils import to_hash_mask, split_into_tokens
+from .utils.profanity_utils import ProfanityCheck, ProfanityList, ProfanityExtraList, word_list_version, warm_up, set_artifact_store, set_extra_words, extra_words, get_model_bound
+from .utils.artifacts import ArtifactStore
+from .utils.general_utils import to_hash_mask, split_into_tokens, tokenize_spans, render_spans
+from .utils.pipeline import ModerationPipeline, encode_checks
+from .utils.cache import LRUCache
+from .utils.worker_pool import ModerationPool
+from .utils.process_backend import ProcessBackend
+from .utils.metrics import Metrics
+from .utils.event_loop import BackgroundLoop
+from .utils.player_state import PlayerState, PlayerStateStore
+from .utils.rate_limit import RateLimiter
+from .utils.spam import SpamDetector
+from .utils.reload import FileWatcher, read_word_list
+from .utils.word_list import WordList
+from .utils.prefilter import Prefilter
+from contextlib import contextmanager
 from enum import Enum
 from random import randint
 import os
 import time
+import threading
+import weakref
 import asyncio
 import inspect
 import importlib.util
 import sys
-from collections import defaultdict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 from pathlib import Path
-from typing import TypedDict, cast, Callable
+from types import MappingProxyType, ModuleType
+from typing import TypedDict, NamedTuple, Mapping, Iterable, Iterator, cast, Callable
 import yaml
 
 pc = ProfanityCheck()
 pl = ProfanityList()
 pe = ProfanityExtraList()
+metrics = Metrics()
 
+# word list files in the word_lists/ folder of Breeze's data folder, added to the built-in lists
+WORD_LIST_FILES = ("blacklist", "whitelist", "longlist")
+pipeline = ModerationPipeline(profanity_check=pc, extra_list=pe, long_list=pl, metrics=metrics)
 
-class PlayerData(TypedDict):
-    latest_time_a_message_was_sent: float
-    last_message: str
+
+# player states can still be used like the old PlayerData dicts
+PlayerData = PlayerState
 
 
 class PlayerDataManager:
-    player_data: defaultdict[str, PlayerData]
+    """
+    keeps the state of online players, keyed by their UUID (`str(player.unique_id)`)
 
-    def __init__(self):
-        self.player_data = defaultdict(
-            lambda: cast(
-                PlayerData,
-                {
-                    "latest_time_a_message_was_sent": time.monotonic() - 10,
-                    "last_message": "",
-                },
-            )
-        )
+    players are added when they join and removed when they leave. every method also
+    accepts a player's name instead of their UUID
+    """
 
-    def update_player_data(self, name, message) -> None:
-        self.player_data[name]["latest_time_a_message_was_sent"] = time.monotonic()
-        self.player_data[name]["last_message"] = message
+    store: PlayerStateStore
+    rate_limiter: RateLimiter
+    """chat rate limits, handlers should check it before filtering a message"""
+    spam_detector: SpamDetector | None
+    """near-duplicate (copy-paste) spam detection, also checked before filtering. None when disabled"""
 
-    def get_player_data(self, name) -> PlayerData:
-        return self.player_data[name]
+    def __init__(self, message_history: int = 8):
+        self.store = PlayerStateStore(history=message_history)
+        self.rate_limiter = RateLimiter()
+        # reads the players' latest messages from the store, which update_player_data fills
+        self.spam_detector = SpamDetector(store=self.store)
 
-    def remove_player_data(self, name) -> None:
-        if name in self.player_data:
-            del self.player_data[name]
+    @property
+    def player_data(self) -> Mapping[str, PlayerState]:
+        return self.store.states
+
+    def add_player(self, player: endstone.Player) -> PlayerState:
+        return self.store.add(str(player.unique_id), player.name)
+
+    def remove_player(self, player: endstone.Player) -> None:
+        self.remove_player_data(str(player.unique_id))
+
+    def update_player_data(self, key, message) -> None:
+        state = self.store.get(key)
+        if state is None:
+            state = self.store.add(key)
+        state.record_message(message)
+
+    def get_player_data(self, key) -> PlayerState:
+        """state of a player. for players that aren't tracked, a blank state that isn't stored is returned"""
+        state = self.store.get(key)
+        if state is None:
+            return PlayerState(key)
+        return state
+
+    def remove_player_data(self, key) -> None:
+        state = self.store.remove(key)
+        for limiter in (self.rate_limiter, self.spam_detector):
+            if limiter is None:
+                continue
+            limiter.forget(key)
+            if state is not None:
+                limiter.forget(state.uuid)
 
 
 class BreezeTextProcessing:
+    backend: ProcessBackend | None = None
+    """when set, check_and_censor runs in worker processes instead of the calling thread"""
+
+    backend_timeout: float | None = 5.0
+    """seconds to wait for a worker process before checking the message on the calling thread instead"""
+
+    on_backend_error: Callable[[ProcessBackend, Exception], None] | None = None
+    """called with the backend and the error whenever a message couldn't be checked in it"""
+
+    verdict_cache: LRUCache | None
+    """results of check_and_censor, keyed on the message's tokens and the checks used. None disables it"""
+
+    metrics: Metrics = metrics
+    """where check_and_censor's timings are recorded"""
+
+    pipeline: ModerationPipeline = pipeline
+    """runs the filters, its stage timings go to its own metrics"""
+
+    def __init__(self, cache_size: int = 4096, cache_ttl: float | None = None):
+        self.verdict_cache = LRUCache(cache_size, cache_ttl) if cache_size > 0 else None
+
     def censor_with_word_list(
         self,
         text: str,
-        word_list: set[str],
-        allowed_words_list: set[str] = set(),
+        word_list: set[str] | frozenset[str] | WordList,
+        allowed_words_list: set[str] | WordList = set(),
         replacement_char: str = "#",
     ) -> tuple[str, bool]:
         """
         Censors a given text with a custom word list.
 
+        Pass the word list as a frozenset (made once, not for every message) or a `WordList`, so
+        checking a message doesn't take longer the bigger the list is. A plain set is copied every call.
+
         Args:
             text (str): The text to censor
         Returns:
@@ -81,28 +155,13 @@ class BreezeTextProcessing:
                 - Boolean indicating if any profanity was found (bool)
         """
 
-        finished_message = text
-        is_bad = False
-
-        if pe.is_profane(finished_message, word_list=word_list):
-            is_bad = True
-            finished_message = pe.censor(
-                text,
-                replacement=replacement_char,
-                word_list=word_list,
-                allowed_words_list=allowed_words_list,
-            )
-
-        if pl.is_profane(finished_message, word_list=word_list):
-            is_bad = True
-            finished_message = pl.censor(
-                text,
-                replacement=replacement_char,
-                word_list=word_list,
-                allowed_words_list=allowed_words_list,
-            )
-
-        return (finished_message, is_bad)
+        return self.pipeline.censor_with_word_list(
+            text,
+            word_list=word_list,
+            # an empty allow list falls back to Breeze's own whitelist
+            allowed_words_list=allowed_words_list or None,
+            replacement=replacement_char,
+        )
 
     def mask_text(self, text: str):
         """
@@ -128,42 +187,112 @@ class BreezeTextProcessing:
                 - A boolean indicating if any profanity was found (bool)
                 - A list of the checks that caught profanity (list)
         """
-        finished_message = text
-        defaults = {
-            "Profanity-check": True,
-            "Extralist": True,
-            "Longlist": True,
-        }
-        if checks is not None:
-            checks = {**defaults, **checks}
+        with self.metrics.time("check_and_censor"):
+            return self._check_and_censor(text, checks)
+
+    def _check_and_censor(self, text: str, checks: dict | None) -> tuple[str, bool, list]:
+        spans = tokenize_spans(text)
+        tokens = [span[3] for span in spans]
+
+        key = None
+        verdict = None
+        if self.verdict_cache is not None:
+            # which tokens get censored only depends on the tokens themselves, and word list changes bump the version
+            key = (tuple(tokens), encode_checks(checks), word_list_version())
+            verdict = self.verdict_cache.get(key)
+
+        if verdict is None:
+            backend = self.backend
+            if backend is not None:
+                try:
+                    verdict = backend.scan(tokens, checks, timeout=self.backend_timeout)
+                except Exception as e:
+                    # a broken or stuck worker process shouldn't stop moderation, check it here instead
+                    if self.on_backend_error is not None:
+                        self.on_backend_error(backend, e)
+            if verdict is None:
+                censored, caught = self.pipeline.scan(tokens, checks)
+                verdict = (tuple(i for i, is_censored in enumerate(censored) if is_censored), caught)
+
+            verdict = (verdict[0], tuple(verdict[1]))
+            if key is not None and self.verdict_cache is not None:
+                self.verdict_cache.put(key, verdict)
+
+        indices, caught = verdict
+        if not caught:
+            return (text, False, [])
+
+        censored = [False] * len(spans)
+        for i in indices:
+            censored[i] = True
+        return (render_spans(text, spans, censored), True, list(caught))
+
+    def iter_check_and_censor(
+        self,
+        messages: Iterable[str],
+        checks: dict | None = None,
+        chunk_size: int = 256,
+        processes: int = 0,
+    ) -> Iterator[tuple[str, bool, list]]:
+        """
+        Checks and censors a stream of messages, like check_and_censor but for bulk jobs (e.g. re-scanning chat logs)
+
+        Messages are read and processed `chunk_size` at a time, with batched ML predictions, so memory stays
+        bounded however many messages there are. Results are yielded in the same order as the messages.
+
+        Args:
+            messages (Iterable[str]): The messages to check, can be a generator or an open file
+            checks (dict | None, optional): Which checks to perform, same as check_and_censor
+            chunk_size (int, optional): How many messages to process at once. Defaults to 256
+            processes (int, optional): Spread the chunks over this many new worker processes. Defaults to 0 (uses
+                the text processing worker processes if they're enabled, otherwise the calling thread)
+        Yields:
+            tuple[str, bool, list]: The same as check_and_censor, for every message
+        """
+        if processes > 0:
+            with ProcessBackend(processes=processes) as backend:
+                yield from backend.iter_check_and_censor(messages, checks, chunk_size=chunk_size)
+        elif self.backend is not None:
+            yield from self.backend.iter_check_and_censor(messages, checks, chunk_size=chunk_size)
         else:
-            checks = defaults
+            yield from self.pipeline.iter_check_and_censor(messages, checks, chunk_size=chunk_size)
 
-        caught = []
-        is_bad = False
+    def cache_stats(self) -> dict[str, float]:
+        """hit/miss/eviction counters of the verdict cache"""
+        if self.verdict_cache is None:
+            return {}
+        return self.verdict_cache.stats()
 
-        # profanity check
-        if pc.is_profane(text) and checks["Profanity-check"]:
-            is_bad = True
-            caught.append("Profanity-check")
+    def token_cache_stats(self) -> dict[str, dict[str, float]]:
+        """hit/miss/eviction counters of each filter's per-token verdict cache"""
+        return {
+            "Extralist": pe.token_cache_stats(),
+            "Longlist": pl.token_cache_stats(),
+        }
+
+    def prefilter_stats(self) -> dict:
+        """how many messages the ML prefilter checked, and how many of them skipped the model"""
+        if pc.prefilter is None:
+            return {}
+        return pc.prefilter.stats()
 
-            finished_message = pc.censor(finished_message, neighbors=2, window_size=1)
 
-        # profanity extralist
-        if pe.is_profane(text) and checks["Extralist"]:
-            is_bad = True
-            caught.append("Extralist")
+def _new_extension_timing() -> dict:
+    return {"status": "loading", "error": None, "import_ms": None, "on_load_ms": None, "on_ready_ms": None}
 
-            finished_message = pe.censor(finished_message, neighbors=2)
 
-        # profanity longlist
-        if pl.is_profane(text) and checks["Longlist"]:
-            is_bad = True
-            caught.append("Longlist")
+class _ProbePlayer:
+    """stand-in player for the test message `/breeze reload` sends through a new handler"""
 
-            finished_message = pl.censor(finished_message, neighbors=1)
+    name = "BreezeReloadProbe"
+    unique_id = "00000000-0000-0000-0000-00000000b7ee"
 
-        return (finished_message, is_bad, caught)
+    def send_message(self, *_args, **_kwargs) -> None:
+        pass
+
+    def __getattr__(self, name: str):
+        # anything else a handler might call on a player does nothing
+        return lambda *_args, **_kwargs: None
 
 
 class BreezeModuleManager:
@@ -190,6 +319,12 @@ class BreezeModuleManager:
         
         self.handler_state = self.HandlerState.NONE
         self.handler = None
+        self.handler_name: str | None = None
+        """the handler setting of the config the current handler was loaded from"""
+        self.extension_modules: dict[str, ModuleType] = {}
+        self.extension_timings: dict[str, dict] = {}
+        """extension file -> status ("loaded", "failed", "timed out" or "skipped"), error and how long import, on_load and on_ready took"""
+        self._on_load_threads: dict[str, threading.Thread] = {}
 
     def _default_handler(
         self,
@@ -197,20 +332,28 @@ class BreezeModuleManager:
         player_data_manager: PlayerDataManager,
         breeze_text_processing: BreezeTextProcessing,
     ) -> "BreezeExtensionAPI.HandlerOutput":
+        sender_uuid = str(handler_input["player"].unique_id)
         finished_message = handler_input["message"]
 
-        local_player_data = player_data_manager.get_player_data(
-            handler_input["player"].name
-        )
         is_bad = False
         fully_cancel_message = (False, "")
         should_check_message = True
 
-        # spam check
-        if time.monotonic() - local_player_data["latest_time_a_message_was_sent"] < 0.5:
-            fully_cancel_message = (True, "spam, gave displayed cancel")
+        # spam check, before any filtering
+        rate_limit = player_data_manager.rate_limiter.check(sender_uuid)
+        if not rate_limit.allowed:
+            fully_cancel_message = (True, f"rate limited ({rate_limit.limit})")
             should_check_message = False
-            handler_input["player"].send_message("You're sending messages too fast!")
+            if rate_limit.limit == "global":
+                handler_input["player"].send_message("Chat is busy right now, please try again")
+            else:
+                handler_input["player"].send_message("You're sending messages too fast!")
+        elif player_data_manager.spam_detector is not None:
+            spam = player_data_manager.spam_detector.check(sender_uuid, handler_input["message"])
+            if spam.is_spam:
+                fully_cancel_message = (True, f"spam ({spam.scope})")
+                should_check_message = False
+                handler_input["player"].send_message("Please don't spam the same message!")
 
         if fully_cancel_message[0]:
             should_check_message = False
@@ -220,9 +363,7 @@ class BreezeModuleManager:
                 handler_input["message"]
             )
 
-        player_data_manager.update_player_data(
-            handler_input["player"].name, handler_input["message"]
-        )
+        player_data_manager.update_player_data(sender_uuid, handler_input["message"])
 
         return {
             "is_bad": is_bad,
@@ -237,8 +378,21 @@ class BreezeModuleManager:
         os.makedirs(path / "extensions" / "handlers", exist_ok=True)
         os.makedirs(path / "types", exist_ok=True)
         os.makedirs(path / "storage", exist_ok=True)
+        os.makedirs(path / "word_lists", exist_ok=True)
         self.is_breeze_installed = True
 
+        for name, description in (
+            ("blacklist", "words that are censored, including misspellings of them"),
+            ("whitelist", "words that are never censored by the blacklist"),
+            ("longlist", "words that are censored wherever they appear, even inside other words"),
+        ):
+            word_list_path = path / "word_lists" / f"{name}.txt"
+            if not word_list_path.exists():
+                word_list_path.write_text(
+                    f"# {description}, added to Breeze's built-in {name}\n"
+                    "# one word per line. lines starting with # are ignored. changes are picked up without a restart\n"
+                )
+
         try:  # write resource files
             resource_files = files("endstone_breeze").joinpath("resources")
 
@@ -317,132 +471,536 @@ class BreezeModuleManager:
             self.logger.error(f"[BreezeModuleManager] Failed to install handlers: {e}")
             self.plugin.set_load_failed()
             
+    def _scan_extension_files(self) -> list[str]:
+        extensions_path = self.breeze_installation_path / "extensions"
+        extension_files = sorted(
+            f
+            for f in os.listdir(extensions_path)
+            if Path(f).suffix == ".py"
+            and not f.startswith("__")
+            and not Path(f).suffix == ".pyi"
+        )
+
+        self.logger.info(
+            f"[BreezeModuleManager] Found {len(extension_files)} extensions in {extensions_path}: {extension_files}"
+        )
+        return extension_files
+
     def _find_extensions(self):
         if self.is_breeze_installed and self.breeze_installation_path is not None:
-            extensions_path = self.breeze_installation_path / "extensions"
-            extension_files = [
-                f
-                for f in os.listdir(extensions_path)
-                if Path(f).suffix == ".py"
-                and not f.startswith("__")
-                and not Path(f).suffix == ".pyi"
-            ]
+            self.extension_files = self._scan_extension_files()
+            self.handler, self.handler_state = self._load_handler(self._breeze_config.get("handler"))
+            self.handler_name = self._breeze_config.get("handler")
+
+    def _import_module(self, module_name: str, path: Path, replaced: dict[str, ModuleType | None] | None = None) -> ModuleType | None:
+        """
+        import a file as a new module, even if it was imported before. None if there's no spec for it, raises if running it fails
+
+        the module it replaced in sys.modules (None if there wasn't one) is recorded in `replaced`,
+        so it can be put back with `_restore_modules`
+        """
+        spec = importlib.util.spec_from_file_location(module_name, str(path))
+        if spec is None or spec.loader is None:
+            return None
+
+        module = importlib.util.module_from_spec(spec)
+        previous = sys.modules.get(module_name)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            # keep the working version importable
+            if previous is not None:
+                sys.modules[module_name] = previous
+            else:
+                sys.modules.pop(module_name, None)
+            raise
+        if replaced is not None:
+            replaced.setdefault(module_name, previous)
+        return module
+
+    @staticmethod
+    def _restore_modules(replaced: dict[str, ModuleType | None]) -> None:
+        """put back the modules that `_import_module` replaced"""
+        for module_name, previous in replaced.items():
+            if previous is not None:
+                sys.modules[module_name] = previous
+            else:
+                sys.modules.pop(module_name, None)
 
+    def _load_handler(
+        self,
+        handler_from_config: str | None,
+        replaced: dict[str, ModuleType | None] | None = None,
+    ) -> tuple[Callable, "BreezeModuleManager.HandlerState"]:
+        """import the handler named in the config, returns it and the handler state (the default handler if there's none)"""
+        if not handler_from_config:
             self.logger.info(
-                f"[BreezeModuleManager] Found {len(extension_files)} extensions in {extensions_path}: {extension_files}"
+                "[BreezeModuleManager] No handler specified in config, falling back to default handler."
             )
-            self.extension_files = extension_files
-
-            handler_from_config = self._breeze_config.get("handler")
-            if handler_from_config:
-                handler_path = extensions_path / "handlers" / handler_from_config
-                if handler_path.is_file():
-                    self.logger.info(
-                        f"[BreezeModuleManager] Loading handler from config: {handler_from_config}"
-                    )
+            return self._default_handler, self.HandlerState.DEFAULT
 
-                    module_name = f"breeze.extensions.handlers.{handler_from_config.removesuffix('.py')}"
-                    handler_func = None
-                    handler_path = extensions_path / "handlers" / handler_from_config
+        handler_path = self.breeze_installation_path / "extensions" / "handlers" / handler_from_config
+        if not handler_path.is_file():
+            self.logger.warning(
+                f"[BreezeModuleManager] Handler from config not found: {handler_from_config}, falling back to default handler."
+            )
+            return self._default_handler, self.HandlerState.DEFAULT
 
-                    spec = importlib.util.spec_from_file_location(
-                        module_name, handler_path
-                    )
-                    if not spec:
-                        self.logger.error(
-                            f"[BreezeModuleManager] Failed to create spec for handler {handler_from_config}, falling back to default handler."
-                        )
-                        self.handler = self._default_handler
-                        self.handler_state = self.HandlerState.DEFAULT
-                        return
-                    if not spec.loader:
-                        self.logger.error(
-                            f"[BreezeModuleManager] Failed to create spec for handler {handler_from_config}, falling back to default handler."
-                        )
-                        self.handler = self._default_handler
-                        self.handler_state = self.HandlerState.DEFAULT
-                        return
-
-                    module = importlib.util.module_from_spec(spec)
-                    sys.modules[module_name] = module
-                    spec.loader.exec_module(module)
-                    handler_func = getattr(module, "handler", None)
-
-                    if handler_func is None:
-                        self.logger.warning(
-                            "[BreezeModuleManager] Custom handler found but no 'handler' function defined. Falling back to the default handler."
-                        )
-                        self.handler_state = self.HandlerState.NONE
-                        self.handler = self._default_handler
-                    else:
-                        self.logger.info(
-                            "[BreezeModuleManager] The custom handler will now override Breeze's default handler."
-                        )
-                        self.handler_state = self.HandlerState.CUSTOM
-                        self.handler = handler_func
-                else:
-                    self.logger.warning(
-                        f"[BreezeModuleManager] Handler from config not found: {handler_from_config}, falling back to default handler."
-                    )
-                    self.handler = self._default_handler
-                    self.handler_state = self.HandlerState.DEFAULT
-            else:
-                self.logger.info(
-                    "[BreezeModuleManager] No handler specified in config, falling back to default handler."
-                )
-                self.handler = self._default_handler
-                self.handler_state = self.HandlerState.DEFAULT
+        self.logger.info(
+            f"[BreezeModuleManager] Loading handler from config: {handler_from_config}"
+        )
+        module_name = f"breeze.extensions.handlers.{handler_from_config.removesuffix('.py')}"
+        module = self._import_module(module_name, handler_path, replaced)
+        if module is None:
+            self.logger.error(
+                f"[BreezeModuleManager] Failed to create spec for handler {handler_from_config}, falling back to default handler."
+            )
+            return self._default_handler, self.HandlerState.DEFAULT
 
-    def _load_extension(self, extension_filename: str, bea: "BreezeExtensionAPI"):
-        """load extension manually, must be simple str of filename and must be in extensions/ directory"""
-        if not self.is_breeze_installed or self.breeze_installation_path is None:
+        handler_func = getattr(module, "handler", None)
+        if handler_func is None:
             self.logger.warning(
-                "[BreezeModuleManager] Cannot load extension because Breeze is not installed."
+                "[BreezeModuleManager] Custom handler found but no 'handler' function defined. Falling back to the default handler."
             )
-            return
+            return self._default_handler, self.HandlerState.NONE
+
+        self.logger.info(
+            "[BreezeModuleManager] The custom handler will now override Breeze's default handler."
+        )
+        return handler_func, self.HandlerState.CUSTOM
 
+    def _import_extension(self, extension_filename: str, replaced: dict[str, ModuleType | None] | None = None) -> ModuleType:
         ext_path = self.breeze_installation_path / "extensions" / extension_filename
         if not ext_path.is_file():
-            self.logger.error(f"[BreezeModuleManager] Extension file not found: {ext_path}")
-            self.plugin.set_load_failed()
+            raise FileNotFoundError(f"Extension file not found: {ext_path}")
+
+        module_name = self._extension_module_name(extension_filename)
+        module = self._import_module(module_name, ext_path, replaced)
+        if module is None:
+            raise ImportError(f"Failed to create spec for {module_name}")
+        return module
+
+    @staticmethod
+    def _extension_module_name(extension_filename: str) -> str:
+        return f"breeze.extensions.{extension_filename.removesuffix('.py')}"
+
+    @staticmethod
+    def _dependencies(module: ModuleType) -> list[str]:
+        """extension files an extension's DEPENDS_ON names (with or without .py)"""
+        return [name if name.endswith(".py") else f"{name}.py" for name in getattr(module, "DEPENDS_ON", ())]
+
+    def _load_order(self, modules: dict[str, ModuleType]) -> tuple[list[list[str]], list[str]]:
+        """
+        split extensions into levels where every extension only depends on ones in earlier levels
+
+        dependencies that aren't in `modules` don't hold anything up here (the extension is
+        skipped later because they never loaded). returns the levels and the extensions that
+        depend on each other in a circle
+        """
+        remaining = {
+            name: [dependency for dependency in self._dependencies(module) if dependency in modules]
+            for name, module in modules.items()
+        }
+        levels = []
+        done: set[str] = set()
+        while remaining:
+            level = sorted(name for name, dependencies in remaining.items() if all(d in done for d in dependencies))
+            if not level:
+                return levels, sorted(remaining)
+            levels.append(level)
+            done.update(level)
+            for name in level:
+                del remaining[name]
+        return levels, []
+
+    @staticmethod
+    def _run_timed(parallel: bool, thread_name: str, func: Callable, *args) -> Future:
+        """
+        run `func(*args)` on its own daemon thread (or right away if not `parallel`), the future's result is (result, seconds)
+
+        daemon threads rather than a pool: an extension stuck in on_load can't block the server from stopping
+        """
+        future: Future = Future()
+
+        def run():
+            start = time.perf_counter()
+            try:
+                result = func(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result((result, time.perf_counter() - start))
+
+        if parallel:
+            threading.Thread(target=run, name=thread_name, daemon=True).start()
+        else:
+            run()
+        return future
+
+    def _wait_for(
+        self,
+        step: str,
+        futures: dict[str, Future],
+        timeouts: dict[str, float | None],
+        start: float | None = None,
+        timings: dict[str, dict] | None = None,
+    ) -> dict:
+        """
+        wait for every extension's `step` ("import" or "on_load") until its timeout (counted from
+        `start`, a time.monotonic(), or now), returns the results of the ones that finished
+
+        failures are recorded in `timings` (`extension_timings` by default). only when loading into
+        `extension_timings` are they logged and mark the load as failed, a reload reports them itself
+        """
+        start = time.monotonic() if start is None else start
+        report = timings is None
+        timings = self.extension_timings if timings is None else timings
+        results = {}
+        for name, future in futures.items():
+            timing = timings[name]
+            timeout = timeouts[name]
+            try:
+                result, seconds = future.result(timeout=None if timeout is None else max(0.0, start + timeout - time.monotonic()))
+            except FutureTimeoutError:
+                timing["status"] = "timed out"
+                timing["error"] = f"{step} took longer than {timeout}s"
+                if report:
+                    self.logger.error(f"[BreezeModuleManager] Extension {name} took longer than {timeout}s in {step}, skipping it")
+                    self.plugin.set_load_failed()
+                continue
+            except Exception as e:
+                timing["status"] = "failed"
+                timing["error"] = str(e)
+                if report:
+                    self.logger.error(f"[BreezeModuleManager] Failed to load extension {name} ({step}): {e}")
+                    self.plugin.set_load_failed()
+                continue
+            timing[f"{step}_ms"] = seconds * 1000
+            results[name] = result
+        return results
+
+    def _call_on_load(self, bea: "BreezeExtensionAPI", module: ModuleType, staged: list) -> None:
+        # so a background on_load that's given up on can be told apart later (see BreezeExtensionAPI.run_task)
+        self._on_load_threads[module.__name__] = threading.current_thread()
+        if not hasattr(module, "on_load"):
+            self.logger.warning(
+                f"[BreezeModuleManager] Extension {module.__name__} has no on_load() function."
+            )
+            return
+        # pdm and btp re-passed for extensions if they use BreezeExtensionAPI
+        with bea.eventbus._registering(module.__name__, staged):
+            module.on_load(bea)
+
+    def load_extensions(self, bea: "BreezeExtensionAPI", parallel: bool = True, timeout: float | None = 10.0) -> None:
+        """
+        import every extension, in parallel when `parallel` is set, and run their on_load
+
+        on_load runs level by level in the order of their `DEPENDS_ON` (a list of other extension
+        file names), so an extension only loads once everything it depends on has. it runs on the
+        calling (server) thread, unless the extension sets `LOAD_IN_BACKGROUND = True`, then it runs
+        on its own thread alongside the rest of its level. an extension whose import or background
+        on_load takes longer than `timeout` seconds (or its own `LOAD_TIMEOUT`) is skipped, along
+        with the ones that depend on it, and a timed out import's half-run module is taken out of
+        sys.modules. an on_load on the server thread can't be cut short, one that took longer than
+        its timeout is logged as a warning. its listeners are only added once its on_load finished in
+        time. how long every step took is kept in `extension_timings`
+        """
+        if not self.is_breeze_installed or self.breeze_installation_path is None:
+            self.logger.warning(
+                "[BreezeModuleManager] Cannot load extensions because Breeze is not installed."
+            )
             return
 
-        module_name = extension_filename.removesuffix(".py")
+        self.extension_modules = {}
+        self.extension_timings = {name: _new_extension_timing() for name in self.extension_files}
 
-        try:
-            module_name = f"breeze.extensions.{extension_filename.removesuffix('.py')}"
-            spec = importlib.util.spec_from_file_location(module_name, str(ext_path))
+        import_threads: dict[str, threading.Thread] = {}
 
-            if spec is None or spec.loader is None:
-                self.logger.error(f"[BreezeModuleManager] Failed to create spec for {module_name}")
-                self.plugin.set_load_failed()
-                return
+        def import_extension(name: str) -> ModuleType:
+            import_threads[name] = threading.current_thread()
+            return self._import_extension(name)
 
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[module_name] = module
-            spec.loader.exec_module(module)
+        imported: dict[str, ModuleType] = self._wait_for(
+            "import",
+            {name: self._run_timed(parallel, f"breeze-import-{name}", import_extension, name) for name in self.extension_files},
+            {name: timeout for name in self.extension_files},
+        )
+        for name in self.extension_files:
+            if self.extension_timings[name]["status"] != "timed out":
+                continue
+            # the import keeps running on its thread, don't let its half-run module be imported or schedule tasks
+            sys.modules.pop(self._extension_module_name(name), None)
+            thread = import_threads.get(name)
+            if thread is not None and thread is not threading.current_thread():
+                bea._abandon_thread(thread)
+        for name, module in imported.items():
             self.logger.info(
-                f"[BreezeModuleManager] Loaded extension module: {module_name}"
+                f"[BreezeModuleManager] Loaded extension module: {module.__name__}"
             )
 
-            if hasattr(module, "on_load"):
-                try:
-                    # pdm and btp re-passed for extensions if they use BreezeExtensionAPI
-                    module.on_load(bea)
-                    self.logger.info(
-                        f"[BreezeModuleManager] Extension {module_name} initialized via on_load()"
-                    )
-                except Exception as e:
-                    self.logger.error(f"BreezeModuleManager: Error in on_load() of {module_name}: {e}")
-                    self.plugin.set_load_failed()
-            else:
+        levels, circular = self._load_order(imported)
+        for name in circular:
+            self._skip_extension(name, "it's part of a circular DEPENDS_ON")
+
+        for level in levels:
+            ready = []
+            for name in level:
+                missing = [d for d in self._dependencies(imported[name]) if d not in self.extension_modules]
+                if missing:
+                    self._skip_extension(name, f"its dependencies didn't load: {', '.join(missing)}")
+                else:
+                    ready.append(name)
+
+            staged, loaded = self._load_level(bea, {name: imported[name] for name in ready}, parallel, timeout)
+            for name in ready:
+                module = imported[name]
+                if name not in loaded:
+                    continue
+                bea.eventbus._replace_owned(set(), staged[name])
+                self.extension_modules[name] = module
+                timing = self.extension_timings[name]
+                timing["status"] = "loaded"
+                self.logger.info(
+                    f"[BreezeModuleManager] Extension {module.__name__} initialized via on_load() "
+                    f"(import {timing['import_ms']:.0f}ms, on_load {timing['on_load_ms']:.0f}ms)"
+                )
+
+    def _load_level(
+        self,
+        bea: "BreezeExtensionAPI",
+        modules: dict[str, ModuleType],
+        parallel: bool,
+        timeout: float | None,
+        timings: dict[str, dict] | None = None,
+    ) -> tuple[dict[str, list], set[str]]:
+        """
+        run the on_load of one dependency level, returns the listeners each one added (held back)
+        and the names of the ones that finished in time
+
+        `LOAD_IN_BACKGROUND` extensions run on their own threads for at most their `LOAD_TIMEOUT`
+        (or `timeout`), the rest on this thread. the tasks of one that failed or timed out are cancelled
+        """
+        staged: dict[str, list] = {name: [] for name in modules}
+        background = {name for name, module in modules.items() if parallel and getattr(module, "LOAD_IN_BACKGROUND", False)}
+        # background ones start first, so they run while the rest load on this thread
+        start = time.monotonic()
+        futures = {
+            name: self._run_timed(True, f"breeze-load-{name}", self._call_on_load, bea, modules[name], staged[name])
+            for name in modules if name in background
+        }
+        for name in modules:
+            if name not in background:
+                futures[name] = self._run_timed(False, f"breeze-load-{name}", self._call_on_load, bea, modules[name], staged[name])
+        loaded = self._wait_for(
+            "on_load",
+            {name: futures[name] for name in modules},
+            {name: getattr(module, "LOAD_TIMEOUT", timeout) if name in background else None for name, module in modules.items()},
+            start,
+            timings,
+        )
+        timings_for = self.extension_timings if timings is None else timings
+        for name, module in modules.items():
+            thread = self._on_load_threads.pop(module.__name__, None)
+            limit = getattr(module, "LOAD_TIMEOUT", timeout)
+            on_load_ms = timings_for[name].get("on_load_ms") if name in loaded else None
+            if name not in background and limit is not None and on_load_ms is not None and on_load_ms > limit * 1000:
+                # it already ran, the server just had to wait for it
                 self.logger.warning(
-                    f"[BreezeModuleManager] Extension {module_name} has no on_load() function."
+                    f"[BreezeModuleManager] Extension {name} took {on_load_ms / 1000:.1f}s in on_load on the server thread, "
+                    f"longer than its {limit}s timeout. Set LOAD_IN_BACKGROUND = True in it to load it off the server thread"
                 )
+            if name not in loaded:
+                # whatever it scheduled before giving up on it, and anything it still tries to schedule
+                if thread is not None and thread is not threading.current_thread():
+                    bea._abandon_thread(thread)
+                bea._cancel_tasks(bea._detach_tasks({module.__name__}))
+        return staged, set(loaded)
+
+    @staticmethod
+    def _load_settings(config: dict) -> tuple[bool, float | None]:
+        """`parallel` and `timeout` for `load_extensions` from the `extensions` section of a config.yaml"""
+        extensions = config.get("extensions") or {}
+        timeout = float(extensions.get("load_timeout_seconds", 10))
+        return bool(extensions.get("parallel_loading", True)), timeout if timeout > 0 else None
+
+    def _skip_extension(self, name: str, reason: str) -> None:
+        timing = self.extension_timings[name]
+        timing["status"] = "skipped"
+        timing["error"] = reason
+        self.logger.error(f"[BreezeModuleManager] Skipping extension {name} because {reason}")
+        self.plugin.set_load_failed()
+
+    def start_deferred(self, bea: "BreezeExtensionAPI", modules: dict[str, ModuleType] | None = None) -> None:
+        """
+        run the loaded extensions' optional `on_ready(bea)` on background threads
 
-        except Exception as e:
-            self.logger.error(f"[BreezeModuleManager] Failed to load extension {extension_filename}: {e}")
-            self.plugin.set_load_failed()
+        for initialization that doesn't have to be done before the server starts (connecting
+        to services, loading models). it must use `bea.run_task` for anything touching the server
+        """
+        for name, module in (self.extension_modules if modules is None else modules).items():
+            if not hasattr(module, "on_ready"):
+                continue
+
+            def on_ready(module=module):
+                with bea.eventbus._registering(module.__name__):
+                    module.on_ready(bea)
+
+            future = self._run_timed(True, f"breeze-ready-{name}", on_ready)
+            future.add_done_callback(partial(self._deferred_done, name))
+
+    def _deferred_done(self, name: str, future: Future) -> None:
+        timing = self.extension_timings.get(name)
+        e = future.exception()
+        if e is not None:
+            self.logger.error(f"[BreezeModuleManager] Error in on_ready() of extension {name}: {e}")
+            if timing is not None:
+                timing["error"] = f"on_ready: {e}"
+            return
+        _, seconds = future.result()
+        if timing is not None:
+            timing["on_ready_ms"] = seconds * 1000
+        self.logger.info(f"[BreezeModuleManager] Extension {name} finished on_ready() in {seconds * 1000:.0f}ms")
+
+    class PreparedReload(NamedTuple):
+        handler: Callable
+        handler_state: "BreezeModuleManager.HandlerState"
+        extensions: dict[str, ModuleType]
+        """extension file name -> freshly imported module in dependency order, on_load not called yet"""
+        timings: dict[str, dict]
+        config: dict
+        """the config.yaml the handler was read from, only used once the reload is applied"""
+        replaced_modules: dict[str, ModuleType | None]
+        """what the new modules replaced in sys.modules, put back if the reload fails"""
+
+    def _validate_handler(self, handler: Callable) -> None:
+        """run a test message through a handler, raises if it fails or returns something that isn't a HandlerOutput"""
+        probe = _ProbePlayer()
+        handler_input: BreezeExtensionAPI.HandlerInput = {
+            "message": "this is a test message from /breeze reload",
+            "player": cast(endstone.Player, probe),
+            "chat_format": "<{0}> {1}",
+            "recipients": [],
+        }
+        # a throwaway player manager, so the probe doesn't use up the server's global rate limit or
+        # land in the spam detector's window. and throwaway text processing, so its verdict doesn't
+        # land in the verdict cache and its timings don't show up in /breeze stats
+        btp = BreezeTextProcessing(cache_size=0)
+        btp.metrics = Metrics(enabled=False)
+        btp.pipeline = ModerationPipeline(profanity_check=pc, extra_list=pe, long_list=pl)
+        output = handler(
+            handler_input=handler_input,
+            player_data_manager=PlayerDataManager(),
+            breeze_text_processing=btp,
+        )
+
+        if not isinstance(output, dict):
+            raise TypeError(f"handler returned {type(output).__name__} instead of a dict")
+        missing = [key for key in BreezeExtensionAPI.HandlerOutput.__annotations__ if key not in output]
+        if missing:
+            raise TypeError(f"handler output is missing {', '.join(missing)}")
+
+    def prepare_reload(self, bea: "BreezeExtensionAPI") -> "BreezeModuleManager.PreparedReload":
+        """
+        import the configured handler and every extension again, without touching the ones in use
+
+        the handler is checked with a test message, and the filters, the handler and extensions
+        get to warm their caches (their optional module level `warm_up(bea)`). raises if anything
+        fails, so a broken edit never replaces a working handler. safe to call off the server thread
+        """
+        with open(self.breeze_installation_path / "config.yaml", "r") as f:
+            config = yaml.safe_load(f)
+
+        replaced: dict[str, ModuleType | None] = {}
+        try:
+            handler, handler_state = self._load_handler(config.get("handler"), replaced)
+            if handler_state == self.HandlerState.NONE:
+                raise ValueError(f"handler {config.get('handler')} has no 'handler' function")
+
+            warm_up()
+            if handler_state == self.HandlerState.CUSTOM:
+                handler_module = sys.modules.get(handler.__module__)
+                if hasattr(handler_module, "warm_up"):
+                    handler_module.warm_up(bea)
+            self._validate_handler(handler)
+
+            extensions = {}
+            timings = {}
+            for extension_filename in self._scan_extension_files():
+                start = time.perf_counter()
+                module = self._import_extension(extension_filename, replaced)
+                if hasattr(module, "warm_up"):
+                    module.warm_up(bea)
+                timings[extension_filename] = {**_new_extension_timing(), "import_ms": (time.perf_counter() - start) * 1000}
+                extensions[extension_filename] = module
+
+            levels, circular = self._load_order(extensions)
+            if circular:
+                raise ValueError(f"circular DEPENDS_ON between {', '.join(circular)}")
+            for name, module in extensions.items():
+                missing = [d for d in self._dependencies(module) if d not in extensions]
+                if missing:
+                    raise ValueError(f"{name} depends on missing extensions: {', '.join(missing)}")
+        except BaseException:
+            # the modules in use stay the ones other code imports
+            self._restore_modules(replaced)
+            raise
+        ordered = {name: extensions[name] for level in levels for name in level}
+
+        return self.PreparedReload(handler, handler_state, ordered, timings, config, replaced)
+
+    def apply_reload(self, prepared: "BreezeModuleManager.PreparedReload", bea: "BreezeExtensionAPI") -> None:
+        """
+        swap in a prepared reload, on the server thread
+
+        the new extensions' on_load runs first with their listeners held back, level by level like
+        `load_extensions` (so `LOAD_IN_BACKGROUND` and `LOAD_TIMEOUT` apply here too). only when every
+        one of them succeeded are the old extensions unloaded (their optional `on_unload(bea)`,
+        listeners and tasks) and the new listeners and handler swapped in
+        """
+        old_owners = {module.__name__ for module in self.extension_modules.values()}
+        new_owners = {module.__name__ for module in prepared.extensions.values()}
+        # the new extensions' tasks are tracked under the same names as the old ones', keep them apart
+        old_tasks = bea._detach_tasks(old_owners)
+
+        parallel, timeout = self._load_settings(prepared.config)
+        levels, _ = self._load_order(prepared.extensions)
+        staged: list = []
+        try:
+            for level in levels:
+                level_staged, loaded = self._load_level(
+                    bea, {name: prepared.extensions[name] for name in level}, parallel, timeout, prepared.timings
+                )
+                failed = [name for name in level if name not in loaded]
+                if failed:
+                    raise RuntimeError(
+                        "; ".join(f"extension {name} failed in on_load: {prepared.timings[name]['error']}" for name in failed)
+                    )
+                for name in level:
+                    staged.extend(level_staged[name])
+                    prepared.timings[name]["status"] = "loaded"
+        except BaseException:
+            bea._cancel_tasks(bea._detach_tasks(new_owners))
+            bea._tasks.update(old_tasks)
+            self._restore_modules(prepared.replaced_modules)
+            raise
+
+        for module in self.extension_modules.values():
+            if hasattr(module, "on_unload"):
+                try:
+                    module.on_unload(bea)
+                except Exception as e:
+                    self.logger.error(f"[BreezeModuleManager] Error in on_unload() of {module.__name__}: {e}")
+        bea._cancel_tasks(old_tasks)
+
+        bea.eventbus._replace_owned(old_owners | new_owners, staged)
+        self.handler, self.handler_state = prepared.handler, prepared.handler_state
+        self._breeze_config = prepared.config
+        self.handler_name = prepared.config.get("handler")
+        self.extension_modules = dict(prepared.extensions)
+        self.extension_files = list(prepared.extensions)
+        self.extension_timings = prepared.timings
+        self.start_deferred(bea)
 
     def start(self, path):
         self._install_breeze(path)
@@ -471,24 +1029,175 @@ class BreezeExtensionAPI:
     """For extensions to interact with Breeze, and for Breeze to interact with extensions"""
 
     class _EventBus:
-        def __init__(self, logger: endstone.Logger):
-            self.listeners = {}
+        class Listener(NamedTuple):
+            func: Callable
+            kind: int
+            timeout: float | None
+            priority: int
+            metric: str
+            """name of the listener's latency timer"""
+            owner: str | None = None
+            """module name of the extension that added the listener while loading"""
+
+        SYNC = 0
+        THREADED = 1
+        ASYNC = 2
+
+        def __init__(self, logger: endstone.Logger, listener_timeout: float | None = 5.0, threads: int = 4):
             self.logger = logger
+            self.listener_timeout = listener_timeout
+            """default timeout (seconds) of async and threaded listeners"""
+
+            # event name -> listeners in the order they're called. the tuples are never changed, only
+            # replaced, so emitting can use them without copying or locking
+            self._plans: dict[str, tuple[BreezeExtensionAPI._EventBus.Listener, ...]] = {}
+            self._lock = threading.Lock()
+
+            # coroutine and threaded listeners run here, so emitting never waits for them
+            self.loop = BackgroundLoop(name="breeze-event-bus", threads=threads)
+
+            # which extension is being loaded on this thread, and where its listeners go when they're staged
+            self._local = threading.local()
+
+        @contextmanager
+        def _registering(self, owner: str, staged: list | None = None):
+            """
+            tag listeners added on this thread with `owner`. if `staged` is given, they're
+            collected there instead of being added, for `_replace_owned` to swap in later
+            """
+            self._local.owner = owner
+            self._local.staged = staged
+            try:
+                yield
+            finally:
+                self._local.owner = None
+                self._local.staged = None
+
+        def _replace_owned(self, owners: set[str], event_listeners: list[tuple[str, "BreezeExtensionAPI._EventBus.Listener"]]):
+            """remove every listener of `owners` and add `event_listeners` (from `_registering`) in one go"""
+            with self._lock:
+                plans: dict[str, list] = {
+                    event_name: [listener for listener in plan if listener.owner not in owners]
+                    for event_name, plan in self._plans.items()
+                }
+                for event_name, listener in event_listeners:
+                    plans.setdefault(event_name, []).append(listener)
+                self._plans = {
+                    event_name: tuple(sorted(plan, key=lambda item: -item.priority))
+                    for event_name, plan in plans.items()
+                    if plan
+                }
+
+        @property
+        def listeners(self) -> dict[str, list[Callable]]:
+            return {event_name: [listener.func for listener in plan] for event_name, plan in self._plans.items()}
+
+        def has_listeners(self, event_name) -> bool:
+            return bool(self._plans.get(event_name))
+
+        def on(self, event_name, func, threaded: bool = False, timeout: float | None = None, priority: int = 0):
+            """
+            listen to an event
+
+            async listeners are scheduled on the bus' event loop without blocking the server thread.
+            sync listeners run on the server thread unless `threaded` is set, then they run on a worker
+            thread (and must not touch the server API directly, use `BreezeExtensionAPI.run_task` for that).
+            async and threaded listeners are stopped waiting on after `timeout` seconds (default `listener_timeout`).
+            listeners with a higher `priority` are called first, same priorities in the order they were added
+            """
+            if inspect.iscoroutinefunction(func):
+                kind = self.ASYNC
+            else:
+                kind = self.THREADED if threaded else self.SYNC
+            listener = self.Listener(
+                func, kind, timeout, priority,
+                f"listener.{event_name}.{getattr(func, '__qualname__', repr(func))}",
+                getattr(self._local, "owner", None),
+            )
 
-        def on(self, event_name, func):
-            self.listeners.setdefault(event_name, []).append(func)
+            staged = getattr(self._local, "staged", None)
+            if staged is not None:
+                staged.append((event_name, listener))
+                return func
+
+            with self._lock:
+                plan = self._plans.get(event_name, ()) + (listener,)
+                # sorted() is stable, so equal priorities keep their registration order
+                self._plans[event_name] = tuple(sorted(plan, key=lambda item: -item.priority))
             self.logger.debug(f"[BreezeExtensionAPI] new listener {func.__name__}")
+            return func
+
+        def unsubscribe(self, event_name, func) -> bool:
+            """stop calling `func` for an event. returns whether it was listening"""
+            with self._lock:
+                plan = self._plans.get(event_name, ())
+                new_plan = tuple(listener for listener in plan if listener.func != func)
+                if len(new_plan) == len(plan):
+                    return False
+                if new_plan:
+                    self._plans[event_name] = new_plan
+                else:
+                    del self._plans[event_name]
+            self.logger.debug(f"[BreezeExtensionAPI] removed listener {getattr(func, '__name__', func)}")
+            return True
 
         def _emit(self, event_name, *args, **kwargs):
-            for func in list(self.listeners.get(event_name, [])):
+            plan = self._plans.get(event_name)
+            if not plan:
+                return
+
+            # async and threaded listeners run after dispatch returned, when the engine's event is gone
+            detached = None
+
+            for listener in plan:
+                start = time.perf_counter()
+
+                if listener.kind == self.SYNC:
+                    try:
+                        listener.func(*args, **kwargs)
+                    except Exception as e:
+                        metrics.increment("listener_errors")
+                        self.logger.error(f"Error in event listener for {event_name}: {e}")
+                    metrics.observe(listener.metric, time.perf_counter() - start)
+                    continue
+
+                if detached is None:
+                    detached = (
+                        tuple(_snapshot_event(arg) for arg in args),
+                        {name: _snapshot_event(value) for name, value in kwargs.items()},
+                    )
+                detached_args, detached_kwargs = detached
+
+                timeout = listener.timeout if listener.timeout is not None else self.listener_timeout
                 try:
-                    if inspect.iscoroutinefunction(func):
-                        asyncio.run(func(*args, **kwargs))
+                    if listener.kind == self.ASYNC:
+                        future = self.loop.submit(listener.func(*detached_args, **detached_kwargs), timeout)
                     else:
-                        func(*args, **kwargs)
+                        future = self.loop.run_in_thread(partial(listener.func, *detached_args, **detached_kwargs), timeout=timeout)
                 except Exception as e:
+                    metrics.increment("listener_errors")
                     self.logger.error(f"Error in event listener for {event_name}: {e}")
-                self.logger.info(f"[BreezeExtensionAPI] Emitted to {str(func)}")
+                    continue
+                future.add_done_callback(partial(self._listener_done, listener.metric, start, timeout))
+
+        def _listener_done(self, metric: str, start: float, timeout: float | None, future: Future):
+            metrics.observe(metric, time.perf_counter() - start)
+            if future.cancelled():
+                return
+            e = future.exception()
+            if e is None:
+                return
+            name = metric.removeprefix("listener.")
+            if isinstance(e, (TimeoutError, asyncio.TimeoutError)):
+                metrics.increment("listener_timeouts")
+                self.logger.warning(f"Event listener {name} took longer than {timeout}s, stopped waiting for it")
+            else:
+                metrics.increment("listener_errors")
+                self.logger.error(f"Error in event listener {name}: {e}")
+
+        def close(self):
+            """stop the event loop, cancelling listeners that are still running"""
+            self.loop.stop()
 
     class HandlerInput(TypedDict):
         message: str
@@ -525,6 +1234,12 @@ class BreezeExtensionAPI:
         self.bmm = bmm
 
         self._event_bus = self._EventBus(logger)
+        self._word_lists: dict[str, WordList] = {}
+        self._word_lists_lock = threading.Lock()
+        # extension module name -> tasks it scheduled in on_load, cancelled when it's reloaded
+        self._tasks: dict[str, list] = {}
+        # threads of background on_loads that timed out, they may still be running
+        self._abandoned_threads: weakref.WeakSet[threading.Thread] = weakref.WeakSet()
 
     plugin: Plugin
     logger: endstone.Logger
@@ -535,9 +1250,9 @@ class BreezeExtensionAPI:
 
         Should not be included in stub for extensions
         """
-        for extension in self.bmm.extension_files:
-            self.logger.info(f"[BreezeModuleManager] Loading extension: {extension}")
-            self.bmm._load_extension(extension, self)
+        parallel, timeout = self.bmm._load_settings(self.bmm._breeze_config)
+        self.logger.info(f"[BreezeModuleManager] Loading extensions: {', '.join(self.bmm.extension_files)}")
+        self.bmm.load_extensions(self, parallel=parallel, timeout=timeout)
 
     @property
     def eventbus(self):
@@ -549,7 +1264,7 @@ class BreezeExtensionAPI:
         Extensions can hook into this to do extra functions but they can NOT modify management."""
 
         self._event_bus._emit("on_breeze_chat_event", event, plugin)
-        self.logger.info("[BreezeExtensionAPI] on_breeze_chat_event")
+        self.logger.debug("[BreezeExtensionAPI] on_breeze_chat_event")
 
         return event, plugin
 
@@ -567,17 +1282,162 @@ class BreezeExtensionAPI:
         self._event_bus._emit(
             "on_breeze_chat_processed", event, handler_output, is_bad, plugin
         )
-        self.logger.info("[BreezeExtensionAPI] on_breeze_chat_processed")
+        self.logger.debug("[BreezeExtensionAPI] on_breeze_chat_processed")
 
         return event, handler_output, is_bad, plugin
 
     def run_task(self, task: Callable[[], None], delay: int = 0, period: int = 0):
-        """Wrapper for the task scheduler's run_task method. Use this to run things in the server's thread."""
+        """
+        Wrapper for the task scheduler's run_task method. Use this to run things in the server's thread.
+
+        Tasks scheduled in an extension's on_load are cancelled when `/breeze reload` reloads the extension.
+        """
+
+        scheduled = self.plugin.server.scheduler.run_task(self.plugin, task, delay, period)
+        owner = getattr(self._event_bus._local, "owner", None)
+        if scheduled is not None and threading.current_thread() in self._abandoned_threads:
+            # an on_load that was given up on and skipped, but kept running
+            self.logger.warning(f"[BreezeExtensionAPI] Cancelled a task scheduled by {owner} after its on_load timed out")
+            scheduled.cancel()
+        elif owner is not None and scheduled is not None:
+            self._tasks.setdefault(owner, []).append(scheduled)
+        return scheduled
+
+    def _abandon_thread(self, thread: threading.Thread) -> None:
+        self._abandoned_threads.add(thread)
+
+    def _detach_tasks(self, owners: set[str]) -> dict[str, list]:
+        return {owner: self._tasks.pop(owner) for owner in owners if owner in self._tasks}
+
+    def _cancel_tasks(self, tasks: dict[str, list]) -> None:
+        for owner_tasks in tasks.values():
+            for task in owner_tasks:
+                try:
+                    task.cancel()
+                except Exception as e:
+                    self.logger.error(f"[BreezeExtensionAPI] Failed to cancel a task: {e}")
+
+    def word_list(self, name: str, words: Iterable[str] = ()) -> WordList:
+        """
+        A managed word list, shared by name between extensions. It's made with `words` the first time it's asked for.
+
+        Pass it to `btp.censor_with_word_list` (as the word list or the allowed words list) and change it at runtime
+        with `add`, `remove` and `bulk_update`. Its matchers are updated in place instead of being rebuilt for every
+        new set, and its `version` goes up with every change.
+        """
+        with self._word_lists_lock:
+            word_list = self._word_lists.get(name)
+            if word_list is None:
+                word_list = self._word_lists[name] = WordList(words, name=name)
+            return word_list
+
+    @property
+    def word_lists(self) -> Mapping[str, WordList]:
+        """Every managed word list made with `word_list`, by name"""
+        return MappingProxyType(self._word_lists)
+
+    @property
+    def metrics(self) -> Metrics:
+        """Breeze's counters and latency histograms. Extensions can record their own with `metrics.time(name)`"""
+        return metrics
+
+    def get_stats(self) -> dict:
+        """
+        Snapshot of Breeze's performance metrics as plain dicts (safe to dump as JSON):
+        messages processed, is_bad rate, p50/p95/p99 of the handler, each filter stage and each listener,
+        the slowest listener, the cache, prefilter and queue counters, and how long each extension took to load.
+        """
+        stats = metrics.snapshot()
+        stats["verdict_cache"] = self.btp.cache_stats()
+        stats["token_caches"] = self.btp.token_cache_stats()
+        stats["prefilter"] = self.btp.prefilter_stats()
+        stats["rate_limiter"] = self.pdm.rate_limiter.stats()
+        if self.pdm.spam_detector is not None:
+            stats["spam_detector"] = self.pdm.spam_detector.stats()
+        stats["extensions"] = {name: dict(timing) for name, timing in self.bmm.extension_timings.items()}
+        pool = getattr(self.plugin, "moderation_pool", None)
+        if pool is not None:
+            stats["moderation_pool"] = pool.stats()
+        return stats
+
+    def get_stats_prometheus(self) -> str:
+        """Breeze's metrics in Prometheus' text format, e.g. to serve over a local socket"""
+        return metrics.to_prometheus()
+
+    def write_stats_prometheus(self, path: Path | str) -> None:
+        """Writes Breeze's metrics to a file for node_exporter's textfile collector (the file is replaced atomically)"""
+        metrics.write_prometheus(path)
+
 
-        self.plugin.server.scheduler.run_task(self.plugin, task, delay, period)
+class ChatEventSnapshot:
+    """
+    copy of the parts of a PlayerChatEvent that listeners use
+
+    in async moderation mode the real event is long gone by the time a message
+    is processed, so listeners of on_breeze_chat_processed get this instead
+    """
+
+    __slots__ = ("player", "message", "format", "recipients")
+
+    def __init__(self, event: PlayerChatEvent):
+        self.player = event.player
+        self.message = event.message
+        self.format = event.format
+        self.recipients = list(event.recipients)
+
+
+class _QueuedMessagesPlayer:
+    """
+    the player handlers get in async moderation mode: messages sent to it are kept and sent
+    from the server thread once the message is handled, everything else goes to the real player
+    """
+
+    def __init__(self, player: endstone.Player):
+        self._player = player
+        self.queued: list[str] = []
+
+    def send_message(self, message) -> None:
+        self.queued.append(message)
+
+    def __getattr__(self, name: str):
+        return getattr(self._player, name)
+
+
+class CommandEventSnapshot:
+    """copy of the parts of a PlayerCommandEvent that listeners use (see ChatEventSnapshot)"""
+
+    __slots__ = ("player", "command")
+
+    def __init__(self, event: PlayerCommandEvent):
+        self.player = event.player
+        self.command = event.command
+
+
+def _snapshot_event(value):
+    """a snapshot of an engine event, for listeners that run after it was dispatched. anything else is returned as is"""
+    if isinstance(value, PlayerChatEvent):
+        return ChatEventSnapshot(value)
+    if isinstance(value, PlayerCommandEvent):
+        return CommandEventSnapshot(value)
+    return value
 
 
 class Breeze(Plugin):  # PLUGIN
+    commands = {
+        "breeze": {
+            "description": "Breeze moderation commands",
+            "usages": ["/breeze (stats|reload)<action: BreezeAction>"],
+            "permissions": ["breeze.command.breeze"],
+        },
+    }
+
+    permissions = {
+        "breeze.command.breeze": {
+            "description": "Allows using /breeze",
+            "default": "op",
+        },
+    }
+
     def on_enable(self) -> None:
         self.logger.info("Enabling Breeze")
         self.installation_path = Path(self.data_folder).resolve()
@@ -585,24 +1445,434 @@ class Breeze(Plugin):  # PLUGIN
         current_directory = os.getcwd()
         self.server.logger.info(f"{current_directory}, {__file__}")
 
-        self.bmm = BreezeModuleManager(logger=self.logger, pdm=self.pdm, btp=self.btp, plugin=self); self.bmm.start(self.installation_path)
-        self.bea = BreezeExtensionAPI(self.logger, pdm=self.pdm, btp=self.btp, bmm=self.bmm, plugin=self); self.bea._load_extensions() 
-
         self._has_load_failed = False
 
+        self.bmm = BreezeModuleManager(logger=self.logger, pdm=self.pdm, btp=self.btp, plugin=self); self.bmm.start(self.installation_path)
+
+        # read before extensions load, failing ones check disable_chat_on_extension_load_error
         with open(self.installation_path / "config.yaml", "r") as f:
             config = yaml.safe_load(f)
         self.breeze_config = config
 
+        # before anything builds a word list matcher: extensions' on_load and the first word list reload
+        if config.get("artifact_cache", True):
+            try:
+                set_artifact_store(ArtifactStore(self.installation_path / "storage" / "artifacts"))
+            except Exception as e:
+                self.logger.error(f"Failed to open the artifact cache, word lists will be rebuilt on every start: {e}")
+
+        self.bea = BreezeExtensionAPI(self.logger, pdm=self.pdm, btp=self.btp, bmm=self.bmm, plugin=self); self.bea._load_extensions() 
+        # on_ready runs once the server is up, so it doesn't hold up the start
+        self.bea.run_task(lambda: self.bmm.start_deferred(self.bea))
+
         if config.get("use_message_handling", True) is not True:
             self.logger.info(
                 "Automatic message handling is disabled, Breeze will not modify or process messages."
             )        
 
+        async_moderation = config.get("async_moderation") or {}
+        if async_moderation.get("enabled", False):
+            self.moderation_pool = ModerationPool(
+                workers=int(async_moderation.get("workers", 4)),
+                queue_size=int(async_moderation.get("queue_size", 256)),
+            )
+            self.queue_full_policy = async_moderation.get("queue_full_policy", "sync")
+            if self.queue_full_policy not in ("sync", "drop"):
+                self.logger.warning(
+                    f"Unknown queue_full_policy '{self.queue_full_policy}', using 'sync' instead"
+                )
+                self.queue_full_policy = "sync"
+            self.logger.info(
+                f"Async moderation enabled with {self.moderation_pool.workers} workers"
+            )
+
+        self._apply_config(config)
+        self._start_hot_reload(config)
+
+        if config.get("warm_up_on_enable", True) and config.get("use_message_handling", True) is True:
+            threading.Thread(target=self._warm_up, name="breeze-warm-up", daemon=True).start()
+
+        process_backend = config.get("process_backend") or {}
+        if process_backend.get("enabled", False):
+            if self.moderation_pool is None:
+                self.logger.warning(
+                    "process_backend is enabled without async_moderation: the server thread still waits for a worker "
+                    "process on every message (up to timeout_seconds). Enable async_moderation too"
+                )
+            timeout = float(process_backend.get("timeout_seconds", 5))
+            self.btp.backend_timeout = timeout if timeout > 0 else None
+            self.btp.on_backend_error = self._on_backend_error
+            try:
+                self.btp.backend = self._start_process_backend(config)
+                self.logger.info(
+                    f"Text processing will run in {self.btp.backend.processes} worker processes"
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to start the text processing worker processes, filtering on the server process instead: {e}")
+
+        ml_batching = config.get("ml_batching") or {}
+        if ml_batching.get("enabled", False):
+            pc.enable_batching(
+                max_batch=int(ml_batching.get("max_batch", 256)),
+                max_wait=float(ml_batching.get("max_wait_ms", 0)) / 1000,
+            )
+            self.logger.info("ML predictions will be batched across messages")
+
+    def _apply_config(self, config: dict, previous: dict | None = None) -> None:
+        """
+        apply the settings that can change while the server is running (on enable, and on every hot reload)
+
+        rate limits and spam detection are only rebuilt when their settings changed, so a reload
+        doesn't forget who was spamming
+        """
+        verdict_cache = config.get("verdict_cache") or {}
+        if verdict_cache.get("enabled", True):
+            ttl = float(verdict_cache.get("ttl_seconds", 0))
+            self.btp.verdict_cache = LRUCache(int(verdict_cache.get("max_size", 4096)), ttl if ttl > 0 else None)
+        else:
+            self.btp.verdict_cache = None
+
+        token_cache_size = int(verdict_cache.get("token_cache_size", 8192))
+        for profanity_filter in (pe, pl):
+            profanity_filter.token_cache = LRUCache(token_cache_size) if token_cache_size > 0 else None
+
+        event_bus = config.get("event_bus") or {}
+        timeout = float(event_bus.get("listener_timeout_seconds", 5))
+        self.bea.eventbus.listener_timeout = timeout if timeout > 0 else None
+        self.bea.eventbus.loop.threads = max(1, int(event_bus.get("listener_threads", 4)))
+
+        rate_limit = config.get("rate_limit") or {}
+        if previous is not None and rate_limit == (previous.get("rate_limit") or {}):
+            pass
+        elif rate_limit.get("enabled", True):
+            per_player = rate_limit.get("per_player") or {}
+            window = rate_limit.get("window") or {}
+            server = rate_limit.get("global") or {}
+            self.pdm.rate_limiter = RateLimiter(
+                player_rate=float(per_player.get("messages_per_second", 2)),
+                player_burst=float(per_player.get("burst", 3)),
+                window_limit=int(window.get("max_messages", 20)),
+                window_seconds=float(window.get("seconds", 30)),
+                global_rate=float(server.get("messages_per_second", 50)),
+                global_burst=float(server.get("burst", 100)),
+            )
+        else:
+            self.pdm.rate_limiter = RateLimiter(player_rate=0, window_limit=0, global_rate=0)
+
+        spam_detection = config.get("spam_detection") or {}
+        if previous is not None and spam_detection == (previous.get("spam_detection") or {}):
+            pass
+        elif spam_detection.get("enabled", True):
+            self.pdm.spam_detector = SpamDetector(
+                player_threshold=int(spam_detection.get("player_threshold", 3)),
+                global_threshold=int(spam_detection.get("global_threshold", 8)),
+                window_seconds=float(spam_detection.get("window_seconds", 30)),
+                max_distance=int(spam_detection.get("max_distance", 8)),
+                min_length=int(spam_detection.get("min_length", 8)),
+                store=self.pdm.store,
+            )
+        else:
+            self.pdm.spam_detector = None
+
+        prefilter = config.get("prefilter") or {}
+        if previous is not None and prefilter == (previous.get("prefilter") or {}):
+            pass
+        else:
+            pc.prefilter = Prefilter(get_model_bound) if prefilter.get("enabled", True) else None
+
+        player_state = config.get("player_state") or {}
+        history = max(0, int(player_state.get("message_history", 8)))
+        # per-player spam detection reads the similar messages from this history, with fewer than
+        # player_threshold remembered it could never see enough of them to drop one
+        player_threshold = int(spam_detection.get("player_threshold", 3))
+        if spam_detection.get("enabled", True) and player_threshold > history:
+            self.logger.warning(
+                f"player_state.message_history ({history}) is lower than spam_detection.player_threshold "
+                f"({player_threshold}), remembering {player_threshold} messages instead"
+            )
+            history = player_threshold
+        self.pdm.store.history = history
+
+        metrics_config = config.get("metrics") or {}
+        metrics.enabled = bool(metrics_config.get("enabled", True))
+        window = int(metrics_config.get("window", 1024))
+        if window != metrics.window:
+            metrics.window = window
+            metrics.reset()
+
+    def on_disable(self) -> None:
+        if self.file_watcher is not None:
+            self.file_watcher.stop()
+            self.file_watcher = None
+        self.bea.eventbus.close()
+        if self.moderation_pool is not None:
+            self.moderation_pool.shutdown()
+            self.moderation_pool = None
+        if self.btp.backend is not None:
+            self.btp.backend.shutdown()
+            self.btp.backend = None
+
     def __init__(self):
         super().__init__()
         self.pdm = PlayerDataManager()
         self.btp = BreezeTextProcessing()
+        self.moderation_pool: ModerationPool | None = None
+        self.queue_full_policy = "sync"
+        self.file_watcher: FileWatcher | None = None
+        self._reload_lock = threading.Lock()
+        self._backend_lock = threading.Lock()
+        self._backend_timeouts = 0
+        self.breeze_config: dict = {}
+
+    def _start_process_backend(self, config: dict) -> ProcessBackend:
+        process_backend = config.get("process_backend") or {}
+        return ProcessBackend(
+            processes=int(process_backend.get("processes", 2)),
+            python_executable=process_backend.get("python_executable") or None,
+            extra_words=extra_words(),
+            prefilter=bool((config.get("prefilter") or {}).get("enabled", True)),
+        )
+
+    def _on_backend_error(self, backend: ProcessBackend, error: Exception) -> None:
+        """
+        a message couldn't be checked in the worker processes (it was checked on the calling thread instead)
+
+        a broken pool (a worker died) fails every message after it, so it's replaced right away. a
+        timeout only means one worker is stuck or busy, the pool is replaced once as many messages
+        timed out as there are workers. runs on whichever thread checked the message
+        """
+        with self._backend_lock:
+            if self.btp.backend is not backend:
+                # already being replaced
+                return
+
+            if isinstance(error, FutureTimeoutError):
+                self._backend_timeouts += 1
+                self.logger.warning(
+                    f"A text processing worker process took longer than {self.btp.backend_timeout}s, checked the message here instead"
+                )
+                if self._backend_timeouts < backend.processes:
+                    return
+                reason = "its workers keep timing out"
+            elif isinstance(error, BrokenProcessPool):
+                reason = f"a worker process died ({error})"
+            else:
+                self.logger.error(f"Failed to check a message in the text processing worker processes, checked it here instead: {error}")
+                return
+
+            self.logger.error(f"Restarting the text processing worker processes because {reason}, filtering on the server process meanwhile")
+            self.btp.backend = None
+            self._backend_timeouts = 0
+
+        backend.shutdown(terminate=True)
+        threading.Thread(target=self._restart_process_backend, name="breeze-backend-restart", daemon=True).start()
+
+    def _restart_process_backend(self) -> None:
+        try:
+            new_backend = self._start_process_backend(self.breeze_config)
+            new_backend.warm_up(timeout=60)
+        except Exception as e:
+            self.logger.error(f"Failed to restart the text processing worker processes, filtering on the server process from now on: {e}")
+            return
+        with self._backend_lock:
+            if self.btp.backend is None:
+                self.btp.backend = new_backend
+                self.logger.info("Text processing worker processes restarted")
+                return
+        new_backend.shutdown()
+
+    # config sections that are only read when Breeze is enabled
+    RESTART_ONLY_CONFIG = ("async_moderation", "process_backend", "ml_batching", "artifact_cache", "hot_reload")
+
+    def _start_hot_reload(self, config: dict):
+        """load the word list files, and watch them and config.yaml for changes if hot reloading is enabled"""
+        word_lists_path = self.installation_path / "word_lists"
+        try:
+            self._reload_word_lists()
+        except Exception as e:
+            self.logger.error(f"Failed to load the word lists in {word_lists_path}: {e}")
+
+        hot_reload = config.get("hot_reload") or {}
+        if not hot_reload.get("enabled", True):
+            return
+
+        self.file_watcher = FileWatcher(
+            interval=float(hot_reload.get("interval_seconds", 2)),
+            on_error=lambda path, e: self.logger.error(f"Failed to reload {path.name}: {e}"),
+        )
+        self.file_watcher.watch(self.installation_path / "config.yaml", self._reload_config)
+        for name in WORD_LIST_FILES:
+            self.file_watcher.watch(word_lists_path / f"{name}.txt", lambda _path: self._reload_word_lists())
+        self.file_watcher.start()
+
+    def _reload_config(self, path: Path):
+        """runs on the file watcher's thread"""
+        with open(path, "r") as f:
+            config = yaml.safe_load(f)
+        if not isinstance(config, dict):
+            raise ValueError("config.yaml is empty or not a mapping, keeping the old config")
+        # apply it on the server thread, between messages
+        self.bea.run_task(lambda: self._apply_reloaded_config(config))
+
+    def _apply_reloaded_config(self, config: dict):
+        old_config = self.breeze_config
+        self.breeze_config = config
+        self.bmm._breeze_config = config
+        self._apply_config(config, previous=old_config)
+
+        needs_restart = [key for key in self.RESTART_ONLY_CONFIG if config.get(key) != old_config.get(key)]
+        self.logger.info("Reloaded config.yaml")
+        if needs_restart:
+            self.logger.warning(f"Changes to {', '.join(needs_restart)} only apply after a restart")
+        if config.get("handler") != self.bmm.handler_name:
+            self.logger.warning("The handler changed, run /breeze reload to switch to it")
+
+    def _reload_word_lists(self):
+        """read the word list files and rebuild the matchers of the lists that changed, runs on the file watcher's thread"""
+        word_lists_path = self.installation_path / "word_lists"
+        changed = set_extra_words({name: read_word_list(word_lists_path / f"{name}.txt") for name in WORD_LIST_FILES})
+        if not changed:
+            return
+        self.logger.info(f"Reloaded word lists: {', '.join(changed)}")
+
+        # worker processes have their own copies of the lists, replace them with ones that have the new words
+        with self._backend_lock:
+            old_backend = self.btp.backend
+        if old_backend is None:
+            return
+        new_backend = self._start_process_backend(self.breeze_config)
+        new_backend.warm_up()
+        with self._backend_lock:
+            if self.btp.backend is old_backend:
+                self.btp.backend = new_backend
+                self._backend_timeouts = 0
+                new_backend = None
+        if new_backend is not None:
+            # the old one was replaced or restarted meanwhile, by _on_backend_error (the restart reads the new words too)
+            new_backend.shutdown()
+            return
+        old_backend.shutdown()
+
+    def _warm_up(self):
+        """load the word lists and ML model in the background, so the first message doesn't have to"""
+        try:
+            timings = warm_up()
+        except Exception as e:
+            self.logger.error(f"Failed to warm up filtering resources: {e}")
+            return
+
+        report = ", ".join(f"{name}: {seconds * 1000:.0f}ms" for name, seconds in timings.items())
+        self.logger.info(f"Filtering resources loaded ({report})")
+
+    def on_command(self, sender: CommandSender, command: Command, args: list[str]) -> bool:
+        if command.name != "breeze":
+            return False
+
+        if not args or args[0] == "stats":
+            self._send_stats(sender)
+            return True
+
+        if args[0] == "reload":
+            self._reload_modules(sender)
+            return True
+
+        sender.send_error_message(f"Unknown action '{args[0]}'")
+        return False
+
+    def _reload_modules(self, sender: CommandSender):
+        """
+        re-import the handler and extensions on a background thread, then swap them in on the server thread
+
+        the current handler keeps handling messages until the new one is imported, tested
+        and warmed up. if anything fails, nothing is swapped
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            sender.send_error_message("A reload is already running")
+            return
+        sender.send_message(f"{ColorFormat.YELLOW}Reloading the handler and extensions...")
+        start = time.perf_counter()
+
+        def fail(e: BaseException):
+            self.logger.error(f"[BreezeModuleManager] Reload failed, keeping the current handler and extensions: {e}")
+            sender.send_error_message(f"Reload failed, nothing was changed: {e}")
+
+        def swap(prepared: BreezeModuleManager.PreparedReload):
+            try:
+                self.bmm.apply_reload(prepared, self.bea)
+            except Exception as e:
+                fail(e)
+                return
+            finally:
+                self._reload_lock.release()
+            handler = self.bmm.handler_name if prepared.handler_state == BreezeModuleManager.HandlerState.CUSTOM else "default"
+            message = (
+                f"Reloaded handler {handler} and {len(prepared.extensions)} extensions "
+                f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+            )
+            self.logger.info(f"[BreezeModuleManager] {message}")
+            sender.send_message(f"{ColorFormat.GREEN}{message}")
+
+        def prepare():
+            try:
+                prepared = self.bmm.prepare_reload(self.bea)
+            except Exception as e:
+                self._reload_lock.release()
+                self.bea.run_task(lambda error=e: fail(error))
+                return
+            self.bea.run_task(lambda: swap(prepared))
+
+        threading.Thread(target=prepare, name="breeze-reload", daemon=True).start()
+
+    def _send_stats(self, sender: CommandSender):
+        if not metrics.enabled:
+            sender.send_message(f"{ColorFormat.YELLOW}Metrics are disabled in the config")
+            return
+
+        stats = self.bea.get_stats()
+        counters = stats["counters"]
+        lines = [
+            # counts are since the start (or a reset), percentiles only over each timer's latest `window` timings
+            f"{ColorFormat.AQUA}Breeze stats{ColorFormat.RESET} ({stats['uptime_seconds'] / 60:.0f} min since start/reset, "
+            f"percentiles over the latest {metrics.window} timings)",
+            f"messages: {counters.get('messages_processed', 0)}, bad: {stats['is_bad_rate'] * 100:.1f}%, "
+            f"cancelled: {counters.get('messages_cancelled', 0)}, handler errors: {counters.get('handler_errors', 0)}",
+        ]
+        for name, timer in stats["timers"].items():
+            if name.startswith("listener."):
+                continue
+            lines.append(
+                f"{name}: p50 {timer['p50_ms']:.2f}ms, p95 {timer['p95_ms']:.2f}ms, p99 {timer['p99_ms']:.2f}ms ({timer['count']})"
+            )
+
+        slowest = stats["slowest_listener"]
+        if slowest is not None:
+            lines.append(f"slowest listener: {slowest['name']} (p99 {slowest['p99_ms']:.2f}ms, max {slowest['max_ms']:.2f}ms)")
+
+        verdict_cache = stats["verdict_cache"]
+        if verdict_cache:
+            lines.append(f"verdict cache: {verdict_cache['size']}/{verdict_cache['max_size']}, hit rate {verdict_cache['hit_rate'] * 100:.1f}%")
+        prefilter = stats["prefilter"]
+        if prefilter.get("checked"):
+            lines.append(f"prefilter: {prefilter['skipped']}/{prefilter['checked']} messages skipped the ML model ({prefilter['hit_rate'] * 100:.1f}%)")
+        extensions = stats["extensions"]
+        if extensions:
+            loaded = [name for name, timing in extensions.items() if timing["status"] == "loaded"]
+            line = f"extensions: {len(loaded)}/{len(extensions)} loaded"
+            slowest = max(loaded, key=lambda name: (extensions[name]["import_ms"] or 0) + (extensions[name]["on_load_ms"] or 0), default=None)
+            if slowest is not None:
+                timing = extensions[slowest]
+                line += f", slowest {slowest} (import {timing['import_ms'] or 0:.0f}ms, on_load {timing['on_load_ms'] or 0:.0f}ms)"
+            lines.append(line)
+        if "moderation_pool" in stats:
+            pool = stats["moderation_pool"]
+            lines.append(f"async queue: {pool['in_flight']}/{pool['queue_size']} in flight, {pool['rejected']} rejected")
+
+        sender.send_message("\n".join(lines))
+
+    def _async_handling_failed(self, event: ChatEventSnapshot, error: Exception):
+        """handling a message on a worker thread raised, runs on the server thread"""
+        self.logger.error(f"Exception while handling message asynchronously: {error}")
+        event.player.send_message(f"{ColorFormat.RED}Your message couldn't be sent, please try again")
 
     def set_load_failed(self):
         """Call method to tell Breeze that plugin load has failed"""
@@ -613,6 +1883,7 @@ class Breeze(Plugin):  # PLUGIN
             self.logger.error("Since certain handlers, extensions may not work, and disable_chat_on_extension_load_error is set to true in the config, chat is now disabled")
 
     def handle(self, handler_input: BreezeExtensionAPI.HandlerInput) -> BreezeExtensionAPI.HandlerOutput:
+        start = time.perf_counter()
         raw = None
         try:
             if self.bmm.handler is None:
@@ -629,6 +1900,7 @@ class Breeze(Plugin):  # PLUGIN
                     breeze_text_processing=self.btp,
                 )
         except Exception as e:
+            metrics.increment("handler_errors")
             self.logger.error(f"Exception while handling message: {e}")
             raw = self.bmm._default_handler(
                 handler_input=handler_input,
@@ -656,6 +1928,13 @@ class Breeze(Plugin):  # PLUGIN
                 )
                 raw[key] = None  # or some sane default
 
+        metrics.observe("handle", time.perf_counter() - start)
+        metrics.increment("messages_processed")
+        if raw["is_bad"]:
+            metrics.increment("messages_bad")
+        if raw["fully_cancel_message"]:
+            metrics.increment("messages_cancelled")
+
         return cast(BreezeExtensionAPI.HandlerOutput, raw)
 
     @event_handler
@@ -681,9 +1960,10 @@ class Breeze(Plugin):  # PLUGIN
 
             handled = self.handle(h_input)
 
-            self.bea.eventbus._emit(
-                "on_breeze_chat_processed", event, handled, handled["is_bad"], self
-            )
+            if self.bea.eventbus.has_listeners("on_breeze_chat_processed"):
+                self.bea.eventbus._emit(
+                    "on_breeze_chat_processed", event, handled, handled["is_bad"], self
+                )
 
             if handled["fully_cancel_message"]:
                 event.cancel()
@@ -693,14 +1973,11 @@ class Breeze(Plugin):  # PLUGIN
 
     @event_handler
     def on_player_quit(self, event: PlayerQuitEvent):
-        player = event.player
-        self.pdm.remove_player_data(player.name)
+        self.pdm.remove_player(event.player)
 
     @event_handler
     def on_player_join(self, event: PlayerJoinEvent):
-        pdata = self.pdm.get_player_data(event.player.name)
-        pdata["latest_time_a_message_was_sent"] = time.monotonic() - 10
-        pdata["last_message"] = ""
+        self.pdm.add_player(event.player)
         if self._has_load_failed and self.breeze_config.get("disable_chat_on_extension_load_error", False):
             event.player.send_message(f"{ColorFormat.RED}Chat is temporarily disabled for technical reasons")
       
@@ -713,7 +1990,8 @@ class Breeze(Plugin):  # PLUGIN
             event.player.send_message(f"{ColorFormat.RED}Chat is temporarily disabled for technical reasons")
             return
         
-        self.bea.eventbus._emit("on_breeze_chat_event", event, self)
+        if self.bea.eventbus.has_listeners("on_breeze_chat_event"):
+            self.bea.eventbus._emit("on_breeze_chat_event", event, self)
 
         h_input: BreezeExtensionAPI.HandlerInput = {
             "message": event.message,
@@ -722,14 +2000,51 @@ class Breeze(Plugin):  # PLUGIN
             "recipients": event.recipients,
         }
 
-        handled = self.handle(h_input)
+        if self.moderation_pool is not None:
+            snapshot = ChatEventSnapshot(event)
+            # players can only be messaged from the server thread
+            player = _QueuedMessagesPlayer(event.player)
+            async_input: BreezeExtensionAPI.HandlerInput = {
+                **h_input,
+                "player": cast(endstone.Player, player),
+                "recipients": snapshot.recipients,
+            }
+            if self.moderation_pool.submit(
+                lambda: self.handle(async_input),
+                # apply the result back on the server thread
+                lambda handled: self.bea.run_task(lambda: self._finish_chat(snapshot, handled, player.queued)),
+                lambda e: self.bea.run_task(lambda error=e: self._async_handling_failed(snapshot, error)),
+                # one player's messages are handled in the order they were sent
+                key=str(event.player.unique_id),
+            ):
+                return
 
-        self.bea.eventbus._emit(
-            "on_breeze_chat_processed", event, handled, handled["is_bad"], self
-        )
+            # handling it right here would send it ahead of this player's earlier queued messages
+            if self.queue_full_policy == "drop" or self.moderation_pool.has_pending(str(event.player.unique_id)):
+                event.player.send_message(f"{ColorFormat.RED}Chat is busy right now, please try again")
+                return
+            # "sync": moderation queue is full, handle the message right here instead
+
+        self._finish_chat(event, self.handle(h_input))
+
+    def _finish_chat(
+        self,
+        event: PlayerChatEvent | ChatEventSnapshot,
+        handled: BreezeExtensionAPI.HandlerOutput,
+        notices: list[str] | None = None,
+    ):
+        """tell extensions about the handled message and send it, must run on the server thread"""
+        # what the handler told the player while handling the message on a worker thread
+        for notice in notices or ():
+            event.player.send_message(notice)
+
+        if self.bea.eventbus.has_listeners("on_breeze_chat_processed"):
+            self.bea.eventbus._emit(
+                "on_breeze_chat_processed", event, handled, handled["is_bad"], self
+            )
 
         if handled["fully_cancel_message"]:
             return
         self.server.broadcast_message(
             f"<{event.player.name}> {handled['finished_message']}"
-        )
+        )
\ No newline at end of file
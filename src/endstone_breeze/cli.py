@@ -0,0 +1,120 @@
+"""
+re-scan chat logs with Breeze's filters, without a server
+
+    breeze-scan chat.log other.log.gz > censored.log
+    cat chat.log | breeze-scan --only-bad --format jsonl
+    python -m endstone_breeze chat.log --processes 4 --checks Extralist,Longlist
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from collections import deque
+from typing import IO, Iterator
+
+from .utils.pipeline import ModerationPipeline, STAGE_NAMES
+from .utils.process_backend import ProcessBackend
+
+
+def _open(path: str) -> IO[str]:
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def _read_lines(paths: list[str]) -> Iterator[tuple[str, int, str]]:
+    """(file, line number, line) of every line of every file, read lazily"""
+    for path in paths:
+        f = _open(path)
+        try:
+            for number, line in enumerate(f, start=1):
+                yield (path, number, line.rstrip("\r\n"))
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def _parse_checks(value: str | None) -> dict[str, bool] | None:
+    if not value:
+        return None
+    enabled = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = enabled - set(STAGE_NAMES)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown checks: {', '.join(sorted(unknown))} (choose from {', '.join(STAGE_NAMES)})")
+    return {name: name in enabled for name in STAGE_NAMES}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="breeze-scan", description="check and censor chat logs with Breeze's filters, one message per line")
+    parser.add_argument("files", nargs="*", default=["-"], help="log files to scan (.gz works too), - or nothing reads stdin")
+    parser.add_argument("-o", "--output", help="write results here instead of stdout")
+    parser.add_argument("--format", choices=("text", "jsonl"), default="text", help="censored lines, or one JSON object per line")
+    parser.add_argument("--only-bad", action="store_true", help="only output lines that something was caught in")
+    parser.add_argument("--checks", type=_parse_checks, help=f"comma separated checks to run (default all: {','.join(STAGE_NAMES)})")
+    parser.add_argument("--replacement", default="#", help="character censored text is replaced with")
+    parser.add_argument("--chunk-size", type=int, default=512, help="lines processed at once")
+    parser.add_argument("--processes", type=int, default=0, help="worker processes to spread chunks over (default: none)")
+    args = parser.parse_args(argv)
+
+    # where each message in flight came from. results come back in the same order the
+    # messages were read, so this only ever holds the chunks that are being processed
+    locations: deque[tuple[str, int]] = deque()
+
+    def messages() -> Iterator[str]:
+        for path, number, line in _read_lines(args.files):
+            locations.append((path, number))
+            yield line
+
+    backend = ProcessBackend(processes=args.processes) if args.processes > 0 else None
+    if backend is not None:
+        results = backend.iter_check_and_censor(messages(), args.checks, args.replacement, args.chunk_size)
+    else:
+        results = ModerationPipeline().iter_check_and_censor(messages(), args.checks, args.replacement, args.chunk_size)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    scanned = bad = 0
+    start = time.perf_counter()
+    try:
+        for censored, is_bad, caught in results:
+            path, number = locations.popleft()
+            scanned += 1
+            bad += is_bad
+            if args.only_bad and not is_bad:
+                continue
+            if args.format == "jsonl":
+                output.write(json.dumps({
+                    "file": path,
+                    "line": number,
+                    "is_bad": is_bad,
+                    "caught": caught,
+                    "censored": censored,
+                }, ensure_ascii=False) + "\n")
+            else:
+                output.write(censored + "\n")
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # output piped into something like `head` that stopped reading
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if backend is not None:
+            backend.shutdown()
+
+    seconds = time.perf_counter() - start
+    print(
+        f"scanned {scanned} lines, {bad} caught, in {seconds:.1f}s ({scanned / seconds if seconds else 0:.0f} lines/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,116 @@
 # stub for extensions
 
-from typing import TypedDict, Callable, Any
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import TypedDict, NamedTuple, Callable, Any, Iterable, Iterator, Mapping
 from endstone import Logger, Player
 from endstone.event import PlayerChatEvent
 from endstone.plugin import Plugin
 
-class PlayerData(TypedDict):
-    """Player data structure for tracking message history and timing."""
+class Metrics:
+    """Counters and rolling latency histograms."""
 
-    latest_time_a_message_was_sent: float
+    enabled: bool
+
+    def increment(self, name: str, amount: int = 1) -> None: ...
+    def observe(self, name: str, seconds: float) -> None: ...
+    def time(self, name: str) -> AbstractContextManager[None]: ...
+    def snapshot(self) -> dict[str, Any]: ...
+    def to_prometheus(self, prefix: str = "breeze") -> str: ...
+
+class PlayerState:
+    """State of one online player. Can also be used like the old PlayerData dict (`state["last_message"]`)."""
+
+    uuid: str
+    name: str
+    last_message_time: float
     last_message: str
+    message_count: int
+
+    def __getitem__(self, key: str) -> Any: ...
+    def __setitem__(self, key: str, value: Any) -> None: ...
+    def record_message(self, message: str, now: float | None = None) -> None: ...
+    def recent_messages(self) -> Iterator[tuple[float, int]]:
+        """(time, message hash) of the player's latest messages, newest first. The hash is the message's SimHash"""
+        ...
+    def messages_since(self, since: float) -> int: ...
+    def repeats_of(self, message: str) -> int: ...
+    def similar_since(self, fingerprint: int, since: float, max_distance: int) -> int:
+        """How many messages sent at or after `since` have a hash within `max_distance` bits of `fingerprint`"""
+        ...
+
+PlayerData = PlayerState
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: str | None
+    """Which limit rejected the message: "player", "window" or "global" (None if allowed)"""
+    retry_after: float
+
+class RateLimiter:
+    """Per-player token bucket and sliding window, plus a server-wide token bucket."""
+
+    def check(self, key: str, now: float | None = None) -> RateLimitResult:
+        """Check a message from a player (by UUID) against every limit, and count it if it's allowed."""
+        ...
+    def allow(self, key: str, now: float | None = None) -> bool: ...
+    def forget(self, key: str) -> None: ...
+    def stats(self) -> dict[str, int]: ...
+
+class SpamVerdict(NamedTuple):
+    is_spam: bool
+    scope: str | None
+    """"player" if the player keeps repeating themselves, "global" if many players send the same thing"""
+    similar: int
+
+class SpamDetector:
+    """Flags messages that are near-duplicates of recent ones (SimHash fingerprints)."""
+
+    def check(self, key: str, message: str, now: float | None = None) -> SpamVerdict:
+        """Check a message from a player (by UUID) against their latest messages in the player data and everyone's recent messages."""
+        ...
+    def forget(self, key: str) -> None: ...
+    def stats(self) -> dict[str, int]: ...
+
+class WordList:
+    """
+    A word list that can be changed while it's in use. Its matchers are updated in place
+    instead of being rebuilt, and `version` goes up with every change.
+    """
+
+    name: str
+
+    def __len__(self) -> int: ...
+    def __contains__(self, word: str) -> bool: ...
+    def __iter__(self) -> Iterator[str]: ...
+    @property
+    def version(self) -> int: ...
+    @property
+    def cache_key(self) -> tuple[WordList, int]:
+        """Changes whenever the list does, for keying cached results on."""
+        ...
+    def add(self, word: str) -> bool: ...
+    def remove(self, word: str) -> bool: ...
+    def bulk_update(self, add: Iterable[str] = (), remove: Iterable[str] = ()) -> int:
+        """Add and remove many words with one version bump, returns how many words changed."""
+        ...
+    def clear(self) -> None: ...
 
 class PlayerDataManager:
-    """Manages player data including message timestamps and content."""
+    """Keeps the state of online players, keyed by UUID (`str(player.unique_id)`). Names are accepted too."""
 
-    player_data: dict[str, PlayerData]
+    player_data: Mapping[str, PlayerState]
+    rate_limiter: RateLimiter
+    spam_detector: SpamDetector | None
 
-    def __init__(self) -> None: ...
-    def update_player_data(self, name: str, message: str) -> None: ...
-    def get_player_data(self, name: str) -> PlayerData: ...
-    def remove_player_data(self, name: str) -> None: ...
+    def __init__(self, message_history: int = 8) -> None: ...
+    def add_player(self, player: Player) -> PlayerState: ...
+    def remove_player(self, player: Player) -> None: ...
+    def update_player_data(self, key: str, message: str) -> None: ...
+    def get_player_data(self, key: str) -> PlayerState:
+        """State of a player. For players that aren't tracked, a blank state that isn't stored is returned."""
+        ...
+    def remove_player_data(self, key: str) -> None: ...
 
 class BreezeTextProcessing:
     """Handles text processing including profanity checking and censoring."""
@@ -30,6 +121,23 @@ class BreezeTextProcessing:
         """
         ...
 
+    def censor_with_word_list(
+        self,
+        text: str,
+        word_list: set[str] | frozenset[str] | WordList,
+        allowed_words_list: set[str] | WordList = set(),
+        replacement_char: str = "#",
+    ) -> tuple[str, bool]:
+        """
+        Censors a given text with a custom word list. Use a `WordList` (see `BreezeExtensionAPI.word_list`)
+        for lists that change at runtime, or a frozenset made once for fixed ones. A plain set is copied
+        on every call, which gets slower the bigger the list is.
+
+        Returns:
+            tuple of (censored_message, is_bad)
+        """
+        ...
+
     def check_and_censor(
         self, text: str, checks: dict[str, bool] | None = None
     ) -> tuple[str, bool, list[str]]:
@@ -41,12 +149,49 @@ class BreezeTextProcessing:
         """
         ...
 
+    def iter_check_and_censor(
+        self,
+        messages: Iterable[str],
+        checks: dict[str, bool] | None = None,
+        chunk_size: int = 256,
+        processes: int = 0,
+    ) -> Iterator[tuple[str, bool, list[str]]]:
+        """
+        Check and censor a stream of messages in bounded memory, `chunk_size` at a time and in order.
+        `processes` spreads the chunks over that many worker processes.
+        """
+        ...
+
 class BreezeExtensionAPI:
     """Public API for Breeze extensions to interact with the system."""
 
     class _EventBus:
         """Internal event bus for extension hooks."""
-        def on(self, event_name: str, func: Callable[..., Any]) -> None: ...
+
+        listener_timeout: float | None
+
+        def on(
+            self,
+            event_name: str,
+            func: Callable[..., Any],
+            threaded: bool = False,
+            timeout: float | None = None,
+            priority: int = 0,
+        ) -> Callable[..., Any]:
+            """
+            Listen to an event. Async listeners run on the bus' background event loop without blocking chat.
+            Sync listeners run on the server thread unless `threaded` is set. Async and threaded listeners
+            are given up on after `timeout` seconds (default `listener_timeout`), and get a snapshot of the
+            chat or command event instead of the event itself.
+            Listeners with a higher `priority` are called first. Returns `func`.
+            """
+            ...
+        def unsubscribe(self, event_name: str, func: Callable[..., Any]) -> bool:
+            """Stop calling `func` for an event. Returns whether it was listening."""
+            ...
+        def has_listeners(self, event_name: str) -> bool: ...
+        @property
+        def listeners(self) -> dict[str, list[Callable[..., Any]]]: ...
 
     class HandlerInput(TypedDict):
         """Input data for message handlers."""
@@ -89,4 +234,27 @@ class BreezeExtensionAPI:
         plugin: Plugin,
     ) -> tuple[PlayerChatEvent, HandlerOutput, bool, Plugin]: ...
     def initialize(self, plugin_instance: Plugin) -> None: ...
-    def run_task(self, task: Callable[[], None], delay: int = 0, period: int = 0): ...
+    def run_task(self, task: Callable[[], None], delay: int = 0, period: int = 0):
+        """Runs a task on the server's thread. Tasks scheduled in an extension's on_load are cancelled when `/breeze reload` reloads it."""
+        ...
+    def word_list(self, name: str, words: Iterable[str] = ()) -> WordList:
+        """
+        A managed word list, shared by name between extensions. It's made with `words` the first time it's asked for.
+        Pass it to `btp.censor_with_word_list` and change it at runtime with `add`, `remove` and `bulk_update`.
+        """
+        ...
+    @property
+    def word_lists(self) -> Mapping[str, WordList]: ...
+    @property
+    def metrics(self) -> Metrics:
+        """Breeze's counters and latency histograms. Extensions can record their own with `metrics.time(name)`"""
+        ...
+    def get_stats(self) -> dict[str, Any]:
+        """Snapshot of Breeze's performance metrics (messages processed, is_bad rate, per-stage and per-listener latencies, prefilter counters, extension load times)"""
+        ...
+    def get_stats_prometheus(self) -> str:
+        """Breeze's metrics in Prometheus' text format"""
+        ...
+    def write_stats_prometheus(self, path: Path | str) -> None:
+        """Writes Breeze's metrics to a file for node_exporter's textfile collector"""
+        ...
@@ -3,12 +3,60 @@ from .profanity_utils import (
     ProfanityCheck,
     ProfanityExtraList,
     ProfanityList,
+    word_list_version,
+    bump_word_list_version,
+    warm_up,
+    load_timings,
+    set_artifact_store,
+    set_extra_words,
+    extra_words,
+    get_blacklist,
+    get_whitelist,
+    get_model_bound,
+)
+
+from .batching import PredictBatcher
+from .prefilter import Prefilter, ModelBound
+from .cache import LRUCache
+from .artifacts import ArtifactStore
+from .metrics import Metrics, LatencyHistogram
+from .event_loop import BackgroundLoop
+from .player_state import PlayerState, PlayerStateStore, message_hash
+from .rate_limit import RateLimiter, RateLimitResult, TokenBucket, SlidingWindowCounter
+from .spam import SpamDetector, SpamVerdict, FingerprintWindow, simhash
+from .reload import FileWatcher, read_word_list
+from .word_list import WordList
+
+from .pipeline import (
+    ModerationPipeline,
+    DEFAULT_CHECKS,
+    encode_checks,
+    decode_checks,
 )
 
 from .general_utils import (
     split_into_tokens,
+    tokenize_spans,
+    render_spans,
+    TokenSpan,
+    WORD,
+    SPACE,
+    PUNCT,
     to_hash_mask,
     levenshtein,
+    bounded_levenshtein,
+    best_substring_match,
+)
+
+from .aho_corasick import (
+    AhoCorasick,
+    get_automaton,
+)
+
+from .fuzzy_index import (
+    BKTree,
+    FuzzyIndex,
+    get_fuzzy_index,
 )
 
 __all__ = [
@@ -17,9 +65,72 @@ __all__ = [
     "ProfanityCheck",
     "ProfanityExtraList",
     "ProfanityList",
+    "word_list_version",
+    "bump_word_list_version",
+    "warm_up",
+    "load_timings",
+    "set_artifact_store",
+    "set_extra_words",
+    "extra_words",
+    "get_blacklist",
+    "get_whitelist",
+    "get_model_bound",
+
+    # batching & caching
+    "PredictBatcher",
+    "Prefilter",
+    "ModelBound",
+    "LRUCache",
+    "ArtifactStore",
+
+    # metrics
+    "Metrics",
+    "LatencyHistogram",
+
+    # players & events
+    "BackgroundLoop",
+    "PlayerState",
+    "PlayerStateStore",
+    "message_hash",
+    "RateLimiter",
+    "RateLimitResult",
+    "TokenBucket",
+    "SlidingWindowCounter",
+    "SpamDetector",
+    "SpamVerdict",
+    "FingerprintWindow",
+    "simhash",
+
+    # word lists
+    "WordList",
+
+    # hot reloading
+    "FileWatcher",
+    "read_word_list",
+
+    # pipeline
+    "ModerationPipeline",
+    "DEFAULT_CHECKS",
+    "encode_checks",
+    "decode_checks",
 
     # general utils
     "split_into_tokens",
+    "tokenize_spans",
+    "render_spans",
+    "TokenSpan",
+    "WORD",
+    "SPACE",
+    "PUNCT",
     "to_hash_mask",
     "levenshtein",
+    "bounded_levenshtein",
+    "best_substring_match",
+
+    # matching
+    "AhoCorasick",
+    "get_automaton",
+    "BKTree",
+    "FuzzyIndex",
+    "get_fuzzy_index",
 ]
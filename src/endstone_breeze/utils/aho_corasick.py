@@ -0,0 +1,118 @@
+from collections import deque
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+
+class AhoCorasick:
+    """
+    multi-pattern substring matcher (Aho-Corasick automaton)
+
+    built once from a word list, then finds every occurrence of every pattern
+    in a single pass over the text, no matter how many patterns there are
+    """
+
+    __slots__ = ("_goto", "_fail", "_out", "_hit", "matches_empty", "patterns")
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = frozenset(patterns)
+        self.matches_empty = "" in self.patterns
+
+        # state 0 is the root
+        self._goto: list[dict[str, int]] = [{}]
+        self._out: list[tuple[str, ...]] = [()]
+
+        for pattern in self.patterns:
+            if not pattern:
+                continue
+            state = 0
+            for c in pattern:
+                nxt = self._goto[state].get(c)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][c] = nxt
+                    self._goto.append({})
+                    self._out.append(())
+                state = nxt
+            self._out[state] = (pattern,)
+
+        # breadth first so every failure link points to an already finished state
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and c not in self._goto[f]:
+                    f = self._fail[f]
+                link = self._goto[f].get(c, 0)
+                self._fail[nxt] = link if link != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        self._hit = [bool(out) for out in self._out]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _step(self, state: int, c: str) -> int:
+        goto = self._goto
+        fail = self._fail
+        while state and c not in goto[state]:
+            state = fail[state]
+        return goto[state].get(c, 0)
+
+    def contains_any(self, text: str) -> bool:
+        """whether any pattern occurs in the text (same as `any(p in text for p in patterns)`)"""
+        if self.matches_empty:
+            return True
+
+        goto = self._goto
+        fail = self._fail
+        hit = self._hit
+        state = 0
+        for c in text:
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            if hit[state]:
+                return True
+        return False
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int, str]]:
+        """yield `(start, end, pattern)` for every pattern occurrence in the text"""
+        state = 0
+        out = self._out
+        for i, c in enumerate(text):
+            state = self._step(state, c)
+            for pattern in out[state]:
+                yield (i + 1 - len(pattern), i + 1, pattern)
+
+    def find_in_tokens(self, tokens: list[str]) -> list[int]:
+        """
+        indices of the tokens that contain at least one pattern
+
+        the automaton is reset at every token, so a pattern never spans two tokens
+        """
+        if self.matches_empty:
+            return list(range(len(tokens)))
+        return [i for i, tok in enumerate(tokens) if self.contains_any(tok)]
+
+
+@lru_cache(maxsize=8)
+def _compile(patterns: frozenset[str]) -> AhoCorasick:
+    return AhoCorasick(patterns)
+
+
+def get_automaton(word_list: Iterable[str]) -> AhoCorasick:
+    """
+    get the compiled automaton for a word list, building it on first use
+
+    automatons are cached by the word list's contents, so passing the same
+    set again (or an equal one) reuses the already compiled automaton. a
+    frozenset is looked up as is, any other iterable is copied into one first (in the size of the list)
+    """
+    if isinstance(word_list, AhoCorasick):
+        return word_list
+    if not isinstance(word_list, frozenset):
+        word_list = frozenset(word_list)
+    return _compile(word_list)
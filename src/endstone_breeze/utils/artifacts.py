@@ -0,0 +1,91 @@
+import hashlib
+import os
+import pickle
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+# bump when the layout of a stored artifact (or of the classes inside it) changes
+FORMAT_VERSION = 3
+
+_MAGIC = b"BRZA"
+# magic, format version, sha256 of the source
+_HEADER = struct.Struct("<4sH32s")
+
+
+def source_digest(*parts: str | bytes) -> bytes:
+    """hash of everything an artifact is built from"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(struct.pack("<Q", len(part)))
+        digest.update(part)
+    return digest.digest()
+
+
+class ArtifactStore:
+    """
+    caches compiled filter artifacts (normalized lists, automatons, indexes) on disk
+
+    each artifact is stored as `<name>.bin` with a header holding the format version
+    and a hash of the source it was built from. it's only rebuilt when that hash
+    changes, otherwise it's read back in one go and unpickled
+
+    artifacts are pickles, and unpickling can run code. the directory has to be as trusted
+    as the extensions/ folder: anyone who can write to it can run code in the server
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.loaded: list[str] = []
+        self.built: list[str] = []
+
+    def _file(self, name: str) -> Path:
+        return self.path / f"{name}.bin"
+
+    def load(self, name: str, digest: bytes) -> Any | None:
+        """load an artifact if it exists and was built from the same source, else None"""
+        file = self._file(name)
+        try:
+            with open(file, "rb") as f:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return None
+                magic, version, stored_digest = _HEADER.unpack(header)
+                if magic != _MAGIC or version != FORMAT_VERSION or stored_digest != digest:
+                    return None
+                # the whole artifact is deserialized anyway, so a plain read is all it needs
+                return pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def save(self, name: str, digest: bytes, artifact: Any) -> None:
+        """write an artifact, replacing the old file only once the new one is complete"""
+        file = self._file(name)
+        tmp = file.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, digest))
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, file)
+
+    def load_or_build(self, name: str, digest: bytes, builder: Callable[[], Any]) -> Any:
+        artifact = self.load(name, digest)
+        if artifact is not None:
+            with self._lock:
+                self.loaded.append(name)
+            return artifact
+
+        artifact = builder()
+        try:
+            self.save(name, digest, artifact)
+        except OSError:
+            # a read-only or full disk only costs us the cache
+            pass
+        with self._lock:
+            self.built.append(name)
+        return artifact
@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Callable, Sequence
+
+
+class _Request:
+    __slots__ = ("texts", "result", "error", "done")
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.result: list[int] | None = None
+        self.error: BaseException | None = None
+        self.done = False
+
+
+class PredictBatcher:
+    """
+    micro-batches ML predictions coming from several threads
+
+    every caller adds its texts to a shared queue. whoever finds no batch in progress
+    becomes the leader, optionally waits up to `max_wait` seconds for the batch to fill,
+    and runs one vectorized predict over everything queued, then hands each caller
+    its own slice of the results. with a single caller this is just a plain predict
+    call, under load batches grow on their own
+    """
+
+    def __init__(
+        self,
+        predict_func: Callable[[list[str]], Sequence],
+        max_batch: int = 256,
+        max_wait: float = 0.0,
+    ):
+        self.predict_func = predict_func
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+
+        self._cond = threading.Condition()
+        self._pending: list[_Request] = []
+        self._pending_texts = 0
+        self._flushing = False
+
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+
+    def predict(self, texts: list[str]) -> list[int]:
+        """predict a list of texts, batched together with whatever other threads are predicting"""
+        if not texts:
+            return []
+
+        request = _Request(texts)
+        with self._cond:
+            self._pending.append(request)
+            self._pending_texts += len(texts)
+            self.requests += 1
+            if self._pending_texts >= self.max_batch:
+                self._cond.notify_all()
+
+        while True:
+            with self._cond:
+                while not request.done and self._flushing:
+                    self._cond.wait()
+                if request.done:
+                    break
+                self._flushing = True
+
+            self._flush()
+
+        if request.error is not None:
+            raise request.error
+        return request.result  # type: ignore[return-value]
+
+    def _flush(self) -> None:
+        """run one batch, must only be called by the current leader"""
+        with self._cond:
+            if self.max_wait:
+                deadline = time.monotonic() + self.max_wait
+                while self._pending_texts < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            batch: list[_Request] = []
+            size = 0
+            while self._pending and (not batch or size + len(self._pending[0].texts) <= self.max_batch):
+                request = self._pending.pop(0)
+                batch.append(request)
+                size += len(request.texts)
+            self._pending_texts -= size
+
+        try:
+            flags = self.predict_func([text for request in batch for text in request.texts])
+            error = None
+        except Exception as e:
+            flags = []
+            error = e
+
+        with self._cond:
+            offset = 0
+            for request in batch:
+                if error is None:
+                    request.result = [int(flag) for flag in flags[offset:offset + len(request.texts)]]
+                else:
+                    request.error = error
+                offset += len(request.texts)
+                request.done = True
+
+            self.batches += 1
+            self.texts += size
+            self._flushing = False
+            self._cond.notify_all()
+
+    def stats(self) -> dict[str, float]:
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "batches": self.batches,
+                "average_batch_size": self.texts / self.batches if self.batches else 0.0,
+                "pending": self._pending_texts,
+            }
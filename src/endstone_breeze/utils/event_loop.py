@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine
+
+
+class BackgroundLoop:
+    """
+    one long-lived asyncio event loop running in a daemon thread
+
+    coroutines are scheduled onto it from any thread without waiting for them, and
+    plain functions can be run on its thread pool. both get an optional timeout.
+    changing `threads` while the loop is running replaces the pool, functions already
+    running finish on the old one
+    """
+
+    def __init__(self, name: str = "breeze-event-loop", threads: int = 4):
+        self.name = name
+        self._threads = max(1, threads)
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def threads(self) -> int:
+        return self._threads
+
+    @threads.setter
+    def threads(self, threads: int) -> None:
+        threads = max(1, threads)
+        with self._lock:
+            if threads == self._threads:
+                return
+            self._threads = threads
+            loop, old_executor = self._loop, self._executor
+            if loop is None:
+                return
+            executor = self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"{self.name}-worker")
+
+        def swap():
+            # on the loop's thread, so nothing scheduled before the swap lands on a pool that's shut down
+            loop.set_default_executor(executor)
+            if old_executor is not None:
+                old_executor.shutdown(wait=False)
+
+        loop.call_soon_threadsafe(swap)
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is not None:
+            return loop
+
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._executor = ThreadPoolExecutor(max_workers=self._threads, thread_name_prefix=f"{self.name}-worker")
+                loop.set_default_executor(self._executor)
+
+                started = threading.Event()
+                loop.call_soon(started.set)
+                self._thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+                started.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro: Coroutine[Any, Any, Any], timeout: float | None = None) -> Future:
+        """schedule a coroutine on the loop and return right away. a timeout cancels it with TimeoutError"""
+        loop = self._ensure_started()
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout)
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run_in_thread(self, func: Callable[..., Any], *args: Any, timeout: float | None = None) -> Future:
+        """
+        run a plain function on the loop's thread pool and return right away
+
+        after the timeout the returned future fails with TimeoutError, but the function
+        itself can't be stopped and keeps its pool thread until it returns
+        """
+        loop = self._ensure_started()
+
+        async def call():
+            return await loop.run_in_executor(None, func, *args)
+
+        return self.submit(call(), timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """cancel whatever is still pending and stop the loop thread"""
+        with self._lock:
+            loop, thread, executor = self._loop, self._thread, self._executor
+            self._loop = self._thread = self._executor = None
+        if loop is None:
+            return
+
+        def cancel_all():
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.call_soon(loop.stop)
+
+        loop.call_soon_threadsafe(cancel_all)
+        if thread is not None:
+            thread.join(timeout)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if not loop.is_running():
+            loop.close()
@@ -0,0 +1,323 @@
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from .general_utils import bounded_levenshtein
+
+
+def whole_word_distance(bad: str) -> int:
+    """how many edits a whole token may be away from a blocked word and still count as it"""
+    return int(max(1, len(bad) // 1.3))
+
+
+def window_distance(bad: str) -> int:
+    """how many edits a window of a token may be away from a blocked word and still count as it"""
+    return max(1, len(bad) // 2)
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over Levenshtein distance
+
+    lookups only visit the subtrees that can still hold a word within the
+    searched distance, instead of comparing against every word. removed words
+    stay in the tree as tombstones until more than half of it is removed
+    """
+
+    __slots__ = ("_root", "_size", "_removed")
+
+    def __init__(self, words: Iterable[str] = ()):
+        # a node is [word, {distance: child node}, largest distance in children]
+        self._root: list | None = None
+        self._size = 0
+        self._removed: set[str] = set()
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        if self._root is None:
+            return
+        stack = [self._root]
+        while stack:
+            word, children, _ = stack.pop()
+            if word not in self._removed:
+                yield word
+            stack.extend(children.values())
+
+    def add(self, word: str) -> None:
+        if self._root is None:
+            self._root = [word, {}, 0]
+            self._size = 1
+            return
+
+        node = self._root
+        while True:
+            d = bounded_levenshtein(word, node[0], len(word) + len(node[0]))
+            if d == 0:
+                if word in self._removed:
+                    self._removed.discard(word)
+                    self._size += 1
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [word, {}, 0]
+                node[2] = max(node[2], d)
+                self._size += 1
+                return
+            node = child
+
+    def discard(self, word: str) -> bool:
+        """remove a word, returns whether it was in the tree"""
+        node = self._root
+        while node is not None:
+            d = bounded_levenshtein(word, node[0], len(word) + len(node[0]))
+            if d == 0:
+                break
+            node = node[1].get(d)
+        if node is None or word in self._removed:
+            return False
+
+        self._removed.add(word)
+        self._size -= 1
+        if len(self._removed) > self._size:
+            # mostly tombstones, rebuild from the words that are left
+            words = list(self)
+            self._root = None
+            self._size = 0
+            self._removed = set()
+            for live in words:
+                self.add(live)
+        return True
+
+    def any_within(self, query: str, max_distance: int) -> bool:
+        """whether any word in the tree is within `max_distance` edits of the query"""
+        if self._root is None:
+            return False
+
+        stack = [self._root]
+        while stack:
+            word, children, max_edge = stack.pop()
+            # distances past max_distance + max_edge can't lead into any child, so don't compute them exactly
+            d = bounded_levenshtein(query, word, max_distance + max_edge)
+            if d <= max_distance and word not in self._removed:
+                return True
+            for edge, child in children.items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        return False
+
+
+class _Bucket:
+    """
+    the blocked words of one length, with bitsets over them for ruling words out in bulk
+
+    bit i of `_chars[c, j]` is set if word i contains the character c at least j times.
+    every character one string has more of than the other takes at least one edit, so a
+    word can only be within k edits of a query if they have at least `max(len(query),
+    length) - k` characters in common (counted with repeats). that is counted for every
+    word at once with a few big-int operations per query character, instead of one step
+    per word
+
+    removed words are left in place with their bit cleared from `_alive`, until more
+    than half of the bucket is removed
+    """
+
+    __slots__ = ("length", "whole_distance", "part_distance", "_words", "_positions", "_chars", "_alive", "_removed")
+
+    def __init__(self, length: int, words: Iterable[str]):
+        self.length = length
+        self.whole_distance = whole_word_distance("x" * length)
+        self.part_distance = window_distance("x" * length)
+        self._reset(words)
+
+    def _reset(self, words: Iterable[str]) -> None:
+        self._words: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._chars: dict[tuple[str, int], int] = {}
+        self._alive = 0
+        self._removed = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(self, word: str) -> None:
+        if word in self._positions:
+            return
+        i = len(self._words)
+        bit = 1 << i
+        self._words.append(word)
+        self._positions[word] = i
+        for key in _char_counts(word):
+            self._chars[key] = self._chars.get(key, 0) | bit
+        self._alive |= bit
+
+    def discard(self, word: str) -> None:
+        i = self._positions.pop(word, None)
+        if i is None:
+            return
+        self._alive &= ~(1 << i)
+        self._removed += 1
+        if self._removed > len(self._positions):
+            # mostly removed words, rebuild from the ones that are left
+            self._reset(list(self._positions))
+
+    def candidates(self, query: str, max_distance: int) -> Iterator[str]:
+        """the words that can still be within `max_distance` edits of the query, a superset of the real matches"""
+        # bit-sliced counter: bit i of counter[j] is bit j of how many characters word i has in common with the query
+        counter: list[int] = []
+        chars = self._chars
+        for key in _char_counts(query):
+            carry = chars.get(key, 0)
+            for j in range(len(counter)):
+                if not carry:
+                    break
+                counter[j], carry = counter[j] ^ carry, counter[j] & carry
+            if carry:
+                counter.append(carry)
+
+        selected = _at_least(counter, max(len(query), self.length) - max_distance, self._alive)
+
+        words = self._words
+        while selected:
+            low = selected & -selected
+            yield words[low.bit_length() - 1]
+            selected ^= low
+
+
+def _char_counts(word: str) -> list[tuple[str, int]]:
+    """`(c, j)` for every character c of the word and every j up to how often it occurs"""
+    seen: dict[str, int] = {}
+    keys = []
+    for c in word:
+        j = seen.get(c, 0) + 1
+        seen[c] = j
+        keys.append((c, j))
+    return keys
+
+
+def _at_least(counter: list[int], threshold: int, alive: int) -> int:
+    """bitset of the words whose count in the bit-sliced `counter` is at least `threshold`"""
+    if threshold <= 0:
+        return alive
+    if threshold >> len(counter):
+        return 0
+    above = 0
+    equal = alive
+    for j in range(len(counter) - 1, -1, -1):
+        if threshold >> j & 1:
+            equal &= counter[j]
+        else:
+            above |= equal & counter[j]
+            equal &= ~counter[j]
+    return above | equal
+
+
+class FuzzyIndex:
+    """
+    fuzzy lookup index over a blacklist, used by ProfanityExtraList
+
+    words are bucketed by length (the allowed distance only depends on a blocked
+    word's length). buckets whose length is too far from the token are skipped
+    without looking at a single word, and in the others a common-characters bound
+    (see _Bucket) rules out most words before any edit distance is computed
+
+    the allowed distances are wide (about 3/4 of the word's length for whole tokens,
+    half of it for parts of a token), so what's left after the bound still grows with
+    the list. it's just a much smaller part of it, see `fuzzy/FuzzyIndex.matches_*`
+    in benchmarks/bench_moderation.py
+
+    `add` and `discard` update a single bucket in place. indexes from `get_fuzzy_index`
+    are shared between everyone using the same word list, so only change your own
+    """
+
+    __slots__ = ("words", "_buckets")
+
+    def __init__(self, words: Iterable[str]):
+        self.words = set(words)
+
+        grouped: dict[int, list[str]] = {}
+        for word in self.words:
+            grouped.setdefault(len(word), []).append(word)
+
+        # sorted by length
+        self._buckets = tuple(_Bucket(length, group) for length, group in sorted(grouped.items()))
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def add(self, word: str) -> bool:
+        """add a word, returns whether it was new"""
+        if word in self.words:
+            return False
+        self.words.add(word)
+
+        for bucket in self._buckets:
+            if bucket.length == len(word):
+                bucket.add(word)
+                return True
+        # first word of this length, the bucket tuple is replaced rather than changed
+        self._buckets = tuple(sorted(self._buckets + (_Bucket(len(word), [word]),), key=lambda bucket: bucket.length))
+        return True
+
+    def discard(self, word: str) -> bool:
+        """remove a word, returns whether it was in the index"""
+        if word not in self.words:
+            return False
+        self.words.discard(word)
+
+        for bucket in self._buckets:
+            if bucket.length == len(word):
+                bucket.discard(word)
+                if not len(bucket):
+                    self._buckets = tuple(other for other in self._buckets if other is not bucket)
+                break
+        return True
+
+    def matches(self, token: str) -> bool:
+        """
+        whether the token is close to any blocked word, either as a whole or through
+        one of its substrings that are as long as the blocked word
+        """
+        n = len(token)
+        for bucket in self._buckets:
+            length = bucket.length
+            whole_distance = bucket.whole_distance
+            if abs(n - length) <= whole_distance:
+                for bad in bucket.candidates(token, whole_distance):
+                    if bounded_levenshtein(token, bad, whole_distance) <= whole_distance:
+                        return True
+
+            if n < length or n - length > 5:
+                continue
+
+            part_distance = bucket.part_distance
+            for i in range(n - length + 1):
+                part = token[i:i + length]
+                for bad in bucket.candidates(part, part_distance):
+                    if bounded_levenshtein(part, bad, part_distance) <= part_distance:
+                        return True
+        return False
+
+
+@lru_cache(maxsize=8)
+def _build(words: frozenset[str]) -> FuzzyIndex:
+    return FuzzyIndex(words)
+
+
+def get_fuzzy_index(word_list: Iterable[str]) -> FuzzyIndex:
+    """
+    get the fuzzy index for a word list, building it on first use
+
+    indexes are cached by the word list's contents, so passing the same set
+    again (or an equal one) reuses the already built index. a frozenset is
+    looked up as is, any other iterable is copied into one first (in the size of the list)
+    """
+    if isinstance(word_list, FuzzyIndex):
+        return word_list
+    if not isinstance(word_list, frozenset):
+        word_list = frozenset(word_list)
+    return _build(word_list)
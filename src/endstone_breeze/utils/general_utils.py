@@ -1,30 +1,81 @@
 import re
+from functools import lru_cache
+
+# Words: letters/numbers with optional non-space symbols inside
+# Separators: whitespace or punctuation
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9](?:[^\w\s]{0,2}[A-Za-z0-9])*|\s+|[^\w\s]")
+# same tokens, plus single leftover word characters (like non-latin letters) that aren't part of any token
+_SPAN_PATTERN = re.compile(r"([A-Za-z0-9](?:[^\w\s]{0,2}[A-Za-z0-9])*)|(\s+)|([^\w\s])|(\w)")
+_SPACED_OUT_PATTERN = re.compile(r"(?:[A-Za-z0-9][^\w\s]+)+[A-Za-z0-9]")
+_NON_WORD_PATTERN = re.compile(r"[^\w]")
+
+WORD = "word"
+SPACE = "space"
+PUNCT = "punct"
+
+# (start, end, kind, normalized token)
+TokenSpan = tuple[int, int, str, str]
+
 
 def _normalize_token(token: str) -> str:
     # Case 1: spaced-out letters (f>u>c>k, a.s.s)
-    if re.fullmatch(r"(?:[A-Za-z0-9][^\w\s]+)+[A-Za-z0-9]", token):
-        return re.sub(r"[^\w]", "", token).lower()
+    if _SPACED_OUT_PATTERN.fullmatch(token):
+        return _NON_WORD_PATTERN.sub("", token).lower()
     # Case 2: normal word
     return token.lower()
 
+def tokenize_spans(text: str) -> list[TokenSpan]:
+    """
+    Split text into tokens for profanity filtering, in one pass, as spans over the original text:
+    - words (letters/numbers with optional embedded symbols, like f*ck, sh!t, f>u>c>k), normalized
+    - separators (spaces, punctuation, etc.), as-is
+
+    returns `(start, end, kind, normalized)` tuples, where kind is WORD, SPACE or PUNCT.
+    characters that are neither (like non-latin letters) aren't part of any span
+    """
+    spans: list[TokenSpan] = []
+    append = spans.append
+    for match in _SPAN_PATTERN.finditer(text):
+        kind = match.lastindex
+        if kind == 1:
+            word = match.group(1)
+            append((match.start(), match.end(), WORD, word.lower() if word.isalnum() else _normalize_token(word)))
+        elif kind == 2:
+            append((match.start(), match.end(), SPACE, match.group(2)))
+        elif kind == 3:
+            append((match.start(), match.end(), PUNCT, match.group(3)))
+        # kind 4: a leftover word character, not part of any span
+    return spans
+
 def split_into_tokens(text: str) -> list[str]:
     """
     Split text into tokens for profanity filtering:
     - words (letters/numbers with optional embedded symbols, like f*ck, sh!t, f>u>c>k)
     - separators (spaces, punctuation, etc.)
     """
-    # Words: letters/numbers with optional non-space symbols inside
-    # Separators: whitespace or punctuation
-    raw_tokens = re.findall(r"[A-Za-z0-9](?:[^\w\s]{0,2}[A-Za-z0-9])*|\s+|[^\w\s]", text)
-
-    tokens = []
-    for t in raw_tokens:
-        if re.match(r"[A-Za-z0-9]", t):  # word-like
-            tokens.append(_normalize_token(t))
-        else:  # keep spaces/punctuation as-is
-            tokens.append(t)
+    tokens = _TOKEN_PATTERN.findall(text)
+    for i, token in enumerate(tokens):
+        if token.isalnum():
+            tokens[i] = token.lower()
+        elif len(token) > 1 and not token[0].isspace():
+            tokens[i] = _normalize_token(token)
     return tokens
 
+def render_spans(text: str, spans: list[TokenSpan], censored: list[bool], replacement: str = "#") -> str:
+    """
+    censor the original text by span: every character of a censored token is replaced,
+    the rest of the tokens (case, symbols) are kept as they were
+
+    when anything is censored, characters outside every span (like non-latin letters, which
+    no filter looks at) are left out, so nothing unchecked gets through in a flagged message
+    """
+    if not any(censored):
+        return text
+    return "".join(
+        replacement * (span[1] - span[0]) if is_censored else text[span[0]:span[1]]
+        for span, is_censored in zip(spans, censored)
+    )
+
 def to_hash_mask(text: str, whitelist: str = " .,!?;:'\"()-") -> str:
     """replace all non-whitelisted (punctuation and spaces) characters in the given text with a hash (#)"""
     return ''.join(c if c in whitelist else '#' for c in text)
@@ -48,6 +99,106 @@ def levenshtein(a: str, b: str) -> int:
         prev_row = curr_row
     return prev_row[-1]
 
+@lru_cache(maxsize=4096)
+def _char_masks(pattern: str) -> dict[str, int]:
+    """bit mask of the positions each character appears at in the pattern"""
+    masks: dict[str, int] = {}
+    for i, c in enumerate(pattern):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    return masks
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance between two strings, but only exact up to `max_distance`
+
+    returns the real distance if it is <= max_distance, otherwise max_distance + 1.
+    uses Myers/Hyyro's bit-parallel algorithm (one column of the DP matrix per
+    character of `a`) and stops as soon as the distance can't get low enough
+    """
+    if max_distance < 0:
+        return 0 if a == b else max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if not b:
+        return len(a)
+    if not a:
+        return len(b)
+
+    masks = _char_masks(b)
+    m = len(b)
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv = full
+    mv = 0
+    score = m
+    remaining = len(a)
+
+    for c in a:
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+
+        # the last row can only drop by one per remaining column
+        remaining -= 1
+        if score - remaining > max_distance:
+            return max_distance + 1
+
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+
+    return score if score <= max_distance else max_distance + 1
+
+def best_substring_match(pattern: str, text: str, max_distance: int) -> tuple[int, int] | None:
+    """
+    find the substring of `text` closest to `pattern` in one pass (Myers' approximate matching)
+
+    returns `(distance, end)` of the best match, where `end` is the index right after
+    the match, or None if nothing is within `max_distance` edits
+    """
+    if not pattern:
+        return (0, 0)
+
+    masks = _char_masks(pattern)
+    m = len(pattern)
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv = full
+    mv = 0
+    score = m
+    best = (m, 0) if m <= max_distance else None
+
+    for j, c in enumerate(text):
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+
+        # a match may start anywhere, so the top row stays at zero
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+
+        if score <= max_distance and (best is None or score < best[0]):
+            best = (score, j + 1)
+            if score == 0:
+                break
+
+    return best
+
 def count_words(text: str) -> int:
     """
     counts words in a string. words are sequences of letters/numbers
@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+class LatencyHistogram:
+    """
+    rolling window of the latest durations, for percentiles, plus all-time count/total/max
+
+    thread-safe. percentiles are computed from the window when asked for, so recording
+    a duration is just an append
+    """
+
+    def __init__(self, window: int = 1024):
+        self._samples: deque[float] = deque(maxlen=max(1, window))
+        self._lock = threading.Lock()
+
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentiles(self, *fractions: float) -> list[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return [0.0] * len(fractions)
+        return [samples[min(len(samples) - 1, int(fraction * len(samples)))] for fraction in fractions]
+
+    def stats(self) -> dict[str, float]:
+        """count, mean, max and p50/p95/p99 in milliseconds"""
+        p50, p95, p99 = self.percentiles(0.50, 0.95, 0.99)
+        with self._lock:
+            count, total, maximum = self.count, self.total, self.max
+        return {
+            "count": count,
+            "mean_ms": total / count * 1000 if count else 0.0,
+            "p50_ms": p50 * 1000,
+            "p95_ms": p95 * 1000,
+            "p99_ms": p99 * 1000,
+            "max_ms": maximum * 1000,
+        }
+
+
+class Metrics:
+    """
+    counters and latency histograms for the moderation hot path
+
+    timers are named with dots, like `stage.Longlist` or `listener.on_breeze_chat_processed.my_listener`.
+    `enabled = False` turns every probe into a no-op
+    """
+
+    def __init__(self, window: int = 1024, enabled: bool = True):
+        self.window = window
+        self.enabled = enabled
+        self.started = time.time()
+
+        self._counters: dict[str, int] = {}
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, LatencyHistogram(self.window))
+        return histogram
+
+    def observe(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        """time the body of a with block into the `name` histogram"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).observe(time.perf_counter() - start)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    def counters(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def timers(self, prefix: str = "") -> dict[str, dict[str, float]]:
+        with self._lock:
+            histograms = [(name, h) for name, h in self._histograms.items() if name.startswith(prefix)]
+        return {name[len(prefix):]: histogram.stats() for name, histogram in sorted(histograms)}
+
+    def snapshot(self) -> dict:
+        """everything as plain dicts, ready to be dumped as JSON"""
+        counters = self.counters()
+        processed = counters.get("messages_processed", 0)
+
+        listeners = self.timers("listener.")
+        slowest = max(listeners.items(), key=lambda item: item[1]["p99_ms"], default=None)
+
+        return {
+            "uptime_seconds": time.time() - self.started,
+            "counters": counters,
+            "is_bad_rate": counters.get("messages_bad", 0) / processed if processed else 0.0,
+            "timers": self.timers(),
+            "slowest_listener": {"name": slowest[0], **slowest[1]} if slowest else None,
+        }
+
+    def to_prometheus(self, prefix: str = "breeze") -> str:
+        """the metrics in Prometheus' text exposition format"""
+        lines = []
+        for name, value in sorted(self.counters().items()):
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        metric = f"{prefix}_latency_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for name, stats in self.timers().items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for quantile in ("p50", "p95", "p99"):
+                lines.append(f'{metric}{{timer="{label}",quantile="0.{quantile[1:]}"}} {stats[quantile + "_ms"] / 1000}')
+            lines.append(f'{metric}_count{{timer="{label}"}} {stats["count"]}')
+            lines.append(f'{metric}_sum{{timer="{label}"}} {stats["mean_ms"] * stats["count"] / 1000}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path | str, prefix: str = "breeze") -> None:
+        """write the metrics to a file for node_exporter's textfile collector, replacing it atomically"""
+        path = Path(path)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(self.to_prometheus(prefix))
+        os.replace(tmp, path)
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
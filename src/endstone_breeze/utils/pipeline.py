@@ -0,0 +1,205 @@
+import time
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple
+
+from .general_utils import tokenize_spans, render_spans
+from .metrics import Metrics
+from .word_list import WordList
+from .profanity_utils import (
+    ProfanityFilter,
+    ProfanityCheck,
+    ProfanityExtraList,
+    ProfanityList,
+)
+
+DEFAULT_CHECKS = {
+    "Profanity-check": True,
+    "Extralist": True,
+    "Longlist": True,
+}
+
+# stage names in the order their bits are used in check and caught masks
+STAGE_NAMES = tuple(DEFAULT_CHECKS)
+
+
+def encode_checks(checks: dict | None) -> int:
+    """pack a checks dict (see ModerationPipeline.check_and_censor) into a bit mask"""
+    merged = {**DEFAULT_CHECKS, **checks} if checks is not None else DEFAULT_CHECKS
+    return sum(1 << i for i, name in enumerate(STAGE_NAMES) if merged[name])
+
+
+def decode_checks(mask: int) -> dict[str, bool]:
+    return {name: bool(mask & (1 << i)) for i, name in enumerate(STAGE_NAMES)}
+
+
+class Stage(NamedTuple):
+    name: str
+    profanity_filter: ProfanityFilter
+    neighbors: int
+
+
+class ModerationPipeline:
+    """
+    runs several profanity filters over one message
+
+    the message is split into token spans once, every stage marks what it caught in a
+    shared censor mask, and the censored message is only built once at the end by
+    replacing the censored spans of the original text
+    """
+
+    def __init__(
+        self,
+        profanity_check: ProfanityCheck | None = None,
+        extra_list: ProfanityExtraList | None = None,
+        long_list: ProfanityList | None = None,
+        metrics: Metrics | None = None,
+    ):
+        self.metrics = metrics
+        """when set, the time each stage takes is recorded as `stage.<name>`"""
+
+        self.profanity_check = profanity_check or ProfanityCheck()
+        self.extra_list = extra_list or ProfanityExtraList()
+        self.long_list = long_list or ProfanityList()
+
+        self.stages = (
+            Stage("Profanity-check", self.profanity_check, 2),
+            Stage("Extralist", self.extra_list, 2),
+            Stage("Longlist", self.long_list, 1),
+        )
+
+    def scan(self, tokens: list[str], checks: dict | None = None) -> tuple[list[bool], list[str]]:
+        """
+        run every enabled stage over already split tokens (from `split_into_tokens`)
+
+        returns (censor mask over the tokens, names of the stages that caught something)
+        """
+        checks = {**DEFAULT_CHECKS, **checks} if checks is not None else DEFAULT_CHECKS
+
+        censored = [False] * len(tokens)
+        caught = []
+        metrics = self.metrics if self.metrics is not None and self.metrics.enabled else None
+
+        for stage in self.stages:
+            if not checks[stage.name]:
+                continue
+
+            start = time.perf_counter() if metrics is not None else 0.0
+            hits = stage.profanity_filter.scan_tokens(tokens)
+            if hits is not None:
+                caught.append(stage.name)
+                stage.profanity_filter.mark_censored(tokens, hits, censored, stage.neighbors)
+            if metrics is not None:
+                metrics.observe(f"stage.{stage.name}", time.perf_counter() - start)
+
+        return (censored, caught)
+
+    def scan_many(self, token_lists: list[list[str]], checks: dict | None = None) -> list[tuple[list[bool], list[str]]]:
+        """
+        same as scan for several messages. the ML stage checks all of them with batched
+        predict calls instead of one call per message
+        """
+        checks = {**DEFAULT_CHECKS, **checks} if checks is not None else DEFAULT_CHECKS
+        results = [([False] * len(tokens), []) for tokens in token_lists]
+        metrics = self.metrics if self.metrics is not None and self.metrics.enabled else None
+
+        for stage in self.stages:
+            if not checks[stage.name]:
+                continue
+
+            start = time.perf_counter() if metrics is not None else 0.0
+            profanity_filter = stage.profanity_filter
+            if isinstance(profanity_filter, ProfanityCheck):
+                all_hits = profanity_filter.scan_tokens_many(token_lists)
+            else:
+                all_hits = [profanity_filter.scan_tokens(tokens) for tokens in token_lists]
+
+            for tokens, hits, (censored, caught) in zip(token_lists, all_hits, results):
+                if hits is not None:
+                    caught.append(stage.name)
+                    profanity_filter.mark_censored(tokens, hits, censored, stage.neighbors)
+            if metrics is not None:
+                metrics.observe(f"stage.{stage.name}", (time.perf_counter() - start) / max(1, len(token_lists)))
+
+        return results
+
+    def check_and_censor_many(
+        self,
+        texts: list[str],
+        checks: dict | None = None,
+        replacement: str = "#",
+    ) -> list[tuple[str, bool, list]]:
+        """check_and_censor for several messages at once (see scan_many)"""
+        all_spans = [tokenize_spans(text) for text in texts]
+        results = self.scan_many([[span[3] for span in spans] for spans in all_spans], checks)
+
+        return [
+            (render_spans(text, spans, censored, replacement), True, caught) if caught else (text, False, caught)
+            for text, spans, (censored, caught) in zip(texts, all_spans, results)
+        ]
+
+    def iter_check_and_censor(
+        self,
+        messages: Iterable[str],
+        checks: dict | None = None,
+        replacement: str = "#",
+        chunk_size: int = 256,
+    ) -> Iterator[tuple[str, bool, list]]:
+        """
+        check_and_censor a stream of messages, in order, `chunk_size` messages at a time
+
+        only one chunk is held in memory, so any amount of messages can be streamed through
+        """
+        messages = iter(messages)
+        while chunk := list(islice(messages, max(1, chunk_size))):
+            yield from self.check_and_censor_many(chunk, checks, replacement)
+
+    def check_and_censor(
+        self,
+        text: str,
+        checks: dict | None = None,
+        replacement: str = "#",
+    ) -> tuple[str, bool, list]:
+        """
+        check a message with every enabled stage and censor what they caught
+
+        returns (censored message, whether anything was caught, names of the stages that caught something)
+        """
+        spans = tokenize_spans(text)
+        censored, caught = self.scan([span[3] for span in spans], checks)
+
+        if not caught:
+            return (text, False, caught)
+        return (render_spans(text, spans, censored, replacement), True, caught)
+
+    def censor_with_word_list(
+        self,
+        text: str,
+        word_list: set[str] | frozenset[str] | WordList,
+        allowed_words_list: set[str] | WordList | None = None,
+        replacement: str = "#",
+    ) -> tuple[str, bool]:
+        """
+        check and censor a message with the fuzzy and substring stages, using a custom word list
+
+        the word list's matchers are cached by its contents. a frozenset (or a WordList) is looked
+        up without copying it, a plain set is copied into one frozenset first on every call, which
+        costs time in the size of the list
+        """
+        if not isinstance(word_list, (frozenset, WordList)):
+            word_list = frozenset(word_list)
+        spans = tokenize_spans(text)
+        tokens = [span[3] for span in spans]
+        censored = [False] * len(tokens)
+        is_bad = False
+
+        for profanity_filter in (self.extra_list, self.long_list):
+            hits = profanity_filter.scan_tokens(tokens, word_list, allowed_words_list)
+            if hits is None:
+                continue
+
+            is_bad = True
+            profanity_filter.mark_censored(tokens, hits, censored, 1)
+
+        if not is_bad:
+            return (text, False)
+        return (render_spans(text, spans, censored, replacement), True)
@@ -0,0 +1,152 @@
+import time
+from array import array
+from types import MappingProxyType
+from typing import Iterator, Mapping
+
+from .spam import simhash
+
+_LEGACY_KEYS = {
+    "latest_time_a_message_was_sent": "last_message_time",
+    "last_message": "last_message",
+}
+
+
+class PlayerState:
+    """
+    state of one online player
+
+    can still be read and written like the old PlayerData dict (`state["last_message"]`),
+    so handlers written for it keep working
+    """
+
+    __slots__ = ("uuid", "name", "last_message_time", "last_message", "message_count", "_times", "_hashes", "_next")
+
+    def __init__(self, uuid: str, name: str = "", history: int = 0):
+        self.uuid = uuid
+        self.name = name
+        # long enough ago that a player's first message is never too fast
+        self.last_message_time = time.monotonic() - 10
+        self.last_message = ""
+        self.message_count = 0
+
+        # ring buffers of the latest messages, `_next` is where the next one goes. this is the
+        # player's only message history, spam detection reads it too
+        self._times = array("d", bytes(8 * history))
+        self._hashes = array("Q", bytes(8 * history))
+        self._next = 0
+
+    def __getitem__(self, key: str):
+        return getattr(self, _LEGACY_KEYS[key])
+
+    def __setitem__(self, key: str, value) -> None:
+        setattr(self, _LEGACY_KEYS[key], value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _LEGACY_KEYS
+
+    def record_message(self, message: str, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.last_message_time = now
+        self.last_message = message
+        self.message_count += 1
+
+        if self._times:
+            i = self._next
+            self._times[i] = now
+            self._hashes[i] = message_hash(message)
+            self._next = (i + 1) % len(self._times)
+
+    def recent_messages(self) -> Iterator[tuple[float, int]]:
+        """(time, message hash) of the latest messages, newest first"""
+        size = len(self._times)
+        for offset in range(1, min(size, self.message_count) + 1):
+            i = (self._next - offset) % size
+            yield (self._times[i], self._hashes[i])
+
+    def messages_since(self, since: float) -> int:
+        """how many of the remembered messages were sent after `since` (a time.monotonic() time)"""
+        return sum(1 for sent_at, _ in self.recent_messages() if sent_at > since)
+
+    def repeats_of(self, message: str) -> int:
+        """how many of the remembered messages are the same as `message`"""
+        target = message_hash(message)
+        return sum(1 for _, h in self.recent_messages() if h == target)
+
+    def similar_since(self, fingerprint: int, since: float, max_distance: int) -> int:
+        """how many of the messages sent at or after `since` have a hash within `max_distance` bits of `fingerprint`"""
+        return sum(
+            1 for sent_at, h in self.recent_messages()
+            if sent_at >= since and (fingerprint ^ h).bit_count() <= max_distance
+        )
+
+
+def message_hash(message: str) -> int:
+    """
+    64-bit hash of a message, ignoring case, punctuation and spacing
+
+    it's the message's SimHash, so messages that only differ a little get hashes that only differ in a few bits
+    """
+    return simhash(message)
+
+
+class PlayerStateStore:
+    """
+    online players' states keyed by UUID
+
+    lookups never create entries, entries are only made when players join (or send their
+    first message) and removed when they leave, so memory stays flat however many players
+    come and go. names are kept in a second index for callers that only have a name
+    """
+
+    def __init__(self, history: int = 8):
+        self.history = max(0, history)
+        self._states: dict[str, PlayerState] = {}
+        self._uuids_by_name: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __iter__(self) -> Iterator[PlayerState]:
+        return iter(list(self._states.values()))
+
+    @property
+    def states(self) -> Mapping[str, PlayerState]:
+        """read-only view of UUID -> state"""
+        return MappingProxyType(self._states)
+
+    def get(self, key: str) -> PlayerState | None:
+        """state of a player by UUID (or name), None if they're not tracked"""
+        state = self._states.get(key)
+        if state is None:
+            uuid = self._uuids_by_name.get(key)
+            if uuid is not None:
+                state = self._states.get(uuid)
+        return state
+
+    def add(self, uuid: str, name: str = "") -> PlayerState:
+        """start tracking a player, or return their state if they already are"""
+        state = self._states.get(uuid)
+        if state is None:
+            state = self._states[uuid] = PlayerState(uuid, name, self.history)
+        elif name and state.name != name:
+            self._uuids_by_name.pop(state.name, None)
+            state.name = name
+        if name:
+            self._uuids_by_name[name] = uuid
+        return state
+
+    def remove(self, key: str) -> PlayerState | None:
+        state = self.get(key)
+        if state is None:
+            return None
+        del self._states[state.uuid]
+        if self._uuids_by_name.get(state.name) == state.uuid:
+            del self._uuids_by_name[state.name]
+        return state
+
+    def clear(self) -> None:
+        self._states.clear()
+        self._uuids_by_name.clear()
@@ -0,0 +1,154 @@
+import math
+import threading
+from typing import Any, Callable
+
+
+class ModelBound:
+    """
+    an upper bound on profanity_check's verdict that only needs the words of a message
+
+    the model is a linear SVM over l2 normalized tf-idf features, split into folds that are
+    each calibrated with a sigmoid, and it flags a message when their averaged probability
+    is over 0.5. tf-idf features are never negative and their norm is at most 1, so a fold's
+    score can't be more than its intercept plus sqrt(sum of the squared positive weights of
+    the message's words). when that stays under the score where the fold's probability
+    reaches `max_probability` for every fold, so does the average, and the model can't
+    flag the message
+    """
+
+    def __init__(
+        self,
+        analyzer: Callable[[str], list[str]],
+        weights: dict[str, tuple[float, ...]],
+        folds: list[tuple[float, float, float]],
+    ):
+        self.analyzer = analyzer
+        self.weights = weights
+        """word -> its squared positive weight in every fold, only for words that have one"""
+        self.folds = folds
+        """(intercept, sigmoid a, sigmoid b) of every fold"""
+
+    @classmethod
+    def from_model(cls, vectorizer: Any, model: Any) -> "ModelBound | None":
+        """read the bound from profanity_check's vectorizer and model, None if they aren't the kind it works for"""
+        if getattr(vectorizer, "norm", None) != "l2" or getattr(model, "method", None) != "sigmoid":
+            return None
+        if [int(c) for c in model.classes_] != [0, 1]:
+            return None
+
+        coefs = []
+        folds = []
+        for calibrated in model.calibrated_classifiers_:
+            estimator = getattr(calibrated, "estimator", None) or getattr(calibrated, "base_estimator", None)
+            calibrators = getattr(calibrated, "calibrators", None) or getattr(calibrated, "calibrators_", None)
+            coef = getattr(estimator, "coef_", None)
+            if coef is None or not calibrators or len(coef) != 1:
+                return None
+            a, b = float(calibrators[0].a_), float(calibrators[0].b_)
+            if a >= 0:
+                # the probability has to go up with the score
+                return None
+            coefs.append(coef[0].tolist())
+            folds.append((float(estimator.intercept_[0]), a, b))
+
+        weights = {}
+        for word, column in vectorizer.vocabulary_.items():
+            squared = tuple(max(coef[column], 0.0) ** 2 for coef in coefs)
+            if any(squared):
+                weights[word] = squared
+        return cls(vectorizer.build_analyzer(), weights, folds)
+
+    def limits(self, max_probability: float = 0.5) -> tuple[float, ...]:
+        """per fold, the largest sum of squared weights that keeps its probability at or under `max_probability`"""
+        max_probability = min(max(max_probability, 1e-6), 1 - 1e-6)
+        target = math.log(1 / max_probability - 1)
+
+        limits = []
+        for intercept, a, b in self.folds:
+            # the sigmoid is 1 / (1 + exp(a * score + b)), which is <= max_probability up to this score
+            margin = (target - b) / a - intercept
+            # a little headroom for rounding
+            limits.append(margin * margin * (1 - 1e-9) if margin >= 0 else -1.0)
+        return tuple(limits)
+
+    def is_clean(self, text: str, limits: tuple[float, ...]) -> bool:
+        """whether the model can't flag the text (see `limits`)"""
+        weights = self.weights
+        sums = [0.0] * len(limits)
+        for word in set(self.analyzer(text)):
+            squared = weights.get(word)
+            if squared is None:
+                continue
+            for i, weight in enumerate(squared):
+                sums[i] += weight
+                if sums[i] > limits[i]:
+                    return False
+        return all(total <= limit for total, limit in zip(sums, limits))
+
+
+class Prefilter:
+    """
+    skips profanity_check for messages it can prove the model won't flag (see ModelBound)
+
+    the bound costs a few microseconds per message, while the model takes milliseconds,
+    and most chat is nowhere near it. it's bounded at the model's own threshold, so it only
+    skips messages that would have been passed anyway and never changes a verdict. it only
+    covers the ML stage, the fuzzy and substring stages check every message either way
+
+    the bound is loaded the first time it's needed, when the model isn't one it understands
+    nothing is skipped. `stats` counts how many messages were checked and skipped
+    """
+
+    def __init__(self, loader: Callable[[], ModelBound | None]):
+        self._loader = loader
+        self._bound: ModelBound | None = None
+        self._limits: tuple[float, ...] = ()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        self.checked = 0
+        self.skipped = 0
+
+    def _get_bound(self) -> ModelBound | None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        self._bound = self._loader()
+                    except Exception:
+                        self._bound = None
+                    if self._bound is not None:
+                        self._limits = self._bound.limits()
+                    self._loaded = True
+        return self._bound
+
+    @property
+    def available(self) -> bool:
+        """whether the model could be read, loads the bound if it hasn't been yet"""
+        return self._get_bound() is not None
+
+    def is_clean(self, text: str) -> bool:
+        """whether the text can skip the model"""
+        return not self.unknown([text])
+
+    def unknown(self, texts: list[str]) -> list[int]:
+        """indices of the texts that still have to go through the model"""
+        bound = self._get_bound()
+        if bound is None:
+            return list(range(len(texts)))
+
+        limits = self._limits
+        unknown = [i for i, text in enumerate(texts) if not bound.is_clean(text, limits)]
+        with self._lock:
+            self.checked += len(texts)
+            self.skipped += len(texts) - len(unknown)
+        return unknown
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "available": self._bound is not None if self._loaded else None,
+                "checked": self.checked,
+                "skipped": self.skipped,
+                "hit_rate": self.skipped / self.checked if self.checked else 0.0,
+            }
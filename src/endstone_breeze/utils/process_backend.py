@@ -0,0 +1,157 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from itertools import islice
+from typing import Iterable, Iterator
+
+from .general_utils import tokenize_spans, render_spans
+from .pipeline import STAGE_NAMES, encode_checks, decode_checks
+
+_pipeline = None
+
+
+def _init_worker(extra_words: dict[str, frozenset[str]] | None = None, prefilter: bool = True) -> None:
+    """load the word lists, wordfreq set and ML model once per worker process"""
+    global _pipeline
+    from .pipeline import ModerationPipeline
+    from .prefilter import Prefilter
+    from .profanity_utils import warm_up, set_extra_words, get_model_bound
+
+    if extra_words:
+        set_extra_words(extra_words)
+    warm_up()
+    _pipeline = ModerationPipeline()
+    _pipeline.profanity_check.prefilter = Prefilter(get_model_bound) if prefilter else None
+
+
+def _scan(tokens: list[str], checks: int) -> tuple[tuple[int, ...], int]:
+    """runs in the worker. returns (indices of the censored tokens, caught mask)"""
+    assert _pipeline is not None
+    censored, caught = _pipeline.scan(tokens, decode_checks(checks))
+    return (
+        tuple(i for i, is_censored in enumerate(censored) if is_censored),
+        sum(1 << STAGE_NAMES.index(name) for name in caught),
+    )
+
+
+def _check_chunk(texts: list[str], checks: int, replacement: str) -> list[tuple[str, bool, list]]:
+    """runs in the worker. check_and_censor for a whole chunk of messages"""
+    assert _pipeline is not None
+    return _pipeline.check_and_censor_many(texts, decode_checks(checks), replacement)
+
+
+def _ping() -> bool:
+    return _pipeline is not None
+
+
+class ProcessBackend:
+    """
+    runs ModerationPipeline.check_and_censor in long-lived worker processes
+
+    every worker loads the lists and model once when it starts. per message only the
+    text and a check mask are sent over, and a (censored token indices, caught mask)
+    tuple comes back, so the filtering itself doesn't hold the server's GIL
+    """
+
+    def __init__(
+        self,
+        processes: int = 2,
+        python_executable: str | None = None,
+        start_method: str = "spawn",
+        extra_words: dict[str, frozenset[str]] | None = None,
+        prefilter: bool = True,
+    ):
+        self.processes = max(1, processes)
+
+        context = multiprocessing.get_context(start_method)
+        if python_executable:
+            # embedded interpreters (like the server's) can't always be used to start python processes
+            context.set_executable(python_executable)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=context,
+            initializer=_init_worker,
+            # words added to the built-in lists in the parent (see set_extra_words), workers don't inherit them.
+            # whether the workers use the ML prefilter (see Prefilter)
+            initargs=(extra_words, prefilter),
+        )
+
+    def warm_up(self, timeout: float | None = None) -> None:
+        """start every worker process now instead of on the first messages"""
+        futures = [self._executor.submit(_ping) for _ in range(self.processes)]
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def scan(self, tokens: list[str], checks: dict | None = None, timeout: float | None = None) -> tuple[tuple[int, ...], list[str]]:
+        """
+        scan a message's already split tokens (from `tokenize_spans`) in a worker process (blocks until it's done)
+
+        returns (indices of the tokens to censor, names of the stages that caught something)
+        """
+        future = self._executor.submit(_scan, tokens, encode_checks(checks))
+        try:
+            indices, caught_mask = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # still waiting for a free worker, nobody needs the result anymore
+            future.cancel()
+            raise
+        return (indices, [name for i, name in enumerate(STAGE_NAMES) if caught_mask & (1 << i)])
+
+    def check_and_censor(self, text: str, checks: dict | None = None, replacement: str = "#", timeout: float | None = None) -> tuple[str, bool, list]:
+        """same as ModerationPipeline.check_and_censor, but the filtering runs in a worker process"""
+        spans = tokenize_spans(text)
+        indices, caught = self.scan([span[3] for span in spans], checks, timeout)
+        if not caught:
+            return (text, False, caught)
+
+        censored = [False] * len(spans)
+        for i in indices:
+            censored[i] = True
+        return (render_spans(text, spans, censored, replacement), True, caught)
+
+    def iter_check_and_censor(
+        self,
+        messages: Iterable[str],
+        checks: dict | None = None,
+        replacement: str = "#",
+        chunk_size: int = 256,
+        max_pending: int | None = None,
+    ) -> Iterator[tuple[str, bool, list]]:
+        """
+        ModerationPipeline.iter_check_and_censor spread over the worker processes
+
+        chunks are sent to the workers as they're read, and results come back in order. at most
+        `max_pending` chunks (default twice the number of processes) are in flight at once, so
+        memory stays bounded however long the stream is
+        """
+        messages = iter(messages)
+        checks_mask = encode_checks(checks)
+        max_pending = max_pending or self.processes * 2
+        pending = deque()
+
+        while True:
+            while len(pending) < max_pending:
+                chunk = list(islice(messages, max(1, chunk_size)))
+                if not chunk:
+                    break
+                pending.append(self._executor.submit(_check_chunk, chunk, checks_mask, replacement))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+    def shutdown(self, wait: bool = False, terminate: bool = False) -> None:
+        """stop the workers, `terminate` kills them right away instead of letting them finish what they're doing (e.g. when one is stuck)"""
+        processes = list((getattr(self._executor, "_processes", None) or {}).values()) if terminate else []
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        for process in processes:
+            try:
+                process.terminate()
+            except Exception:
+                pass
+
+    def __enter__(self) -> "ProcessBackend":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.shutdown()
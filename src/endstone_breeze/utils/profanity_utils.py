@@ -1,158 +1,506 @@
-from profanity_check import predict
-from .general_utils import split_into_tokens, levenshtein
+from .general_utils import split_into_tokens, tokenize_spans, render_spans
+from .aho_corasick import AhoCorasick, get_automaton
+from .fuzzy_index import FuzzyIndex, get_fuzzy_index
+from .batching import PredictBatcher
+from .cache import LRUCache
+from .artifacts import ArtifactStore, source_digest
+from .word_list import WordList
+from .prefilter import ModelBound, Prefilter
 import base64
-from wordfreq import top_n_list
+import threading
+import time
+from typing import Any, Callable, Hashable
 
 from .words import blacklist, whitelist
 from .words import longlist as unlonglisted
 
-_longlist = [
-    w.strip().lower()
-    for w in base64.b64decode(unlonglisted).decode("utf-8", errors="ignore").splitlines()
-    if w.strip()
-]
+# the word lists, wordfreq set and ML model are only loaded the first time they're needed
+_resources: dict[str, Any] = {}
+_resource_lock = threading.RLock()
+_load_timings: dict[str, float] = {}
 
-english_words_list = set(top_n_list("en", 10000))
+
+def _load(name: str, loader: Callable[[], Any]) -> Any:
+    resource = _resources.get(name)
+    if resource is not None:
+        return resource
+
+    with _resource_lock:
+        if name not in _resources:
+            start = time.perf_counter()
+            _resources[name] = loader()
+            _load_timings[name] = time.perf_counter() - start
+        return _resources[name]
+
+
+_artifact_store: ArtifactStore | None = None
+
+
+def set_artifact_store(store: ArtifactStore | None) -> None:
+    """
+    keep compiled lists and indexes in this on-disk store, so they don't have to be rebuilt every start
+
+    must be set before the resources are first loaded to have any effect
+    """
+    global _artifact_store
+    _artifact_store = store
+
+
+def _from_store(name: str, digest: Callable[[], bytes], builder: Callable[[], Any]) -> Any:
+    store = _artifact_store
+    if store is None:
+        return builder()
+    return store.load_or_build(name, digest(), builder)
+
+
+def _wordfreq_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("wordfreq")
+    except Exception:
+        return "unknown"
+
+
+def _decode_longlist() -> list[str]:
+    return [
+        w.strip().lower()
+        for w in base64.b64decode(unlonglisted).decode("utf-8", errors="ignore").splitlines()
+        if w.strip()
+    ]
+
+
+def _load_english_words() -> set[str]:
+    from wordfreq import top_n_list
+
+    return set(top_n_list("en", 10000))
+
+
+def _load_predict() -> Callable:
+    # importing profanity_check loads its sklearn model
+    from profanity_check import predict
+
+    return predict
+
+
+def _load_model_bound() -> ModelBound | None:
+    # the model and vectorizer predict uses, so the bound always matches the loaded model
+    get_predict()
+    from profanity_check import profanity_check
+
+    return ModelBound.from_model(profanity_check.vectorizer, profanity_check.model)
+
+
+def get_longlist() -> list[str]:
+    return _load(
+        "longlist",
+        lambda: _from_store("longlist", lambda: source_digest(unlonglisted), _decode_longlist),
+    )
+
+
+def get_english_words() -> set[str]:
+    return _load(
+        "english words",
+        lambda: _from_store("english_words", lambda: source_digest("en", "10000", _wordfreq_version()), _load_english_words),
+    )
+
+
+def get_predict() -> Callable:
+    return _load("profanity_check model", _load_predict)
+
+
+def get_model_bound() -> ModelBound | None:
+    """the bound the ML prefilter uses (see ModelBound), None if it can't be read from the installed model"""
+    bound = _resources.get("profanity_check bound")
+    if bound is None and "profanity_check bound" not in _resources:
+        try:
+            bound = _load("profanity_check bound", _load_model_bound)
+        except Exception:
+            bound = None
+    return bound
+
+
+# words from the word list files in Breeze's data folder, added to the built-in lists
+_extra_words: dict[str, frozenset[str]] = {
+    "blacklist": frozenset(),
+    "whitelist": frozenset(),
+    "longlist": frozenset(),
+}
+
+
+def get_blacklist() -> frozenset[str]:
+    return frozenset(blacklist) | _extra_words["blacklist"]
+
+
+def _build_whitelist(extra: dict[str, frozenset[str]] | None = None) -> frozenset[str]:
+    return frozenset(whitelist) | (extra or _extra_words)["whitelist"]
+
+
+def get_whitelist() -> frozenset[str]:
+    allowed = _resources.get("whitelist")
+    if allowed is None:
+        allowed = _load("whitelist", _build_whitelist)
+    return allowed
+
+
+def _build_longlist_automaton(extra: dict[str, frozenset[str]] | None = None) -> AhoCorasick:
+    words = set(get_longlist()) | (extra or _extra_words)["longlist"]
+    return _from_store(
+        "longlist_automaton",
+        lambda: source_digest(*sorted(words)),
+        lambda: get_automaton(frozenset(words)),
+    )
+
+
+def _build_blacklist_index(extra: dict[str, frozenset[str]] | None = None) -> FuzzyIndex:
+    words = frozenset(blacklist) | (extra or _extra_words)["blacklist"]
+    return _from_store(
+        "blacklist_index",
+        lambda: source_digest(*sorted(words)),
+        lambda: get_fuzzy_index(words),
+    )
+
+
+def get_longlist_automaton() -> AhoCorasick:
+    return _load("longlist automaton", _build_longlist_automaton)
+
+
+def get_blacklist_index() -> FuzzyIndex:
+    return _load("blacklist index", _build_blacklist_index)
+
+
+# resources built from each word list, rebuilt when its extra words change
+_DEPENDENTS = {
+    "blacklist": ("blacklist index", _build_blacklist_index),
+    "whitelist": ("whitelist", _build_whitelist),
+    "longlist": ("longlist automaton", _build_longlist_automaton),
+}
+# one set_extra_words at a time, so two reloads can't swap in each other's half
+_extra_words_lock = threading.Lock()
+
+
+def set_extra_words(lists: dict[str, set[str] | frozenset[str]]) -> list[str]:
+    """
+    add words to the built-in lists ("blacklist", "whitelist" and "longlist"), replacing the previously added ones
+
+    only the matchers of lists that actually changed are rebuilt. they're fully built in the
+    calling thread first, without holding the resource lock, and then swapped in together, so
+    messages being checked (and resources being loaded) meanwhile keep using the old ones.
+    returns the names of the lists that changed
+    """
+    global _extra_words
+    with _extra_words_lock:
+        changed = {name: frozenset(words) for name, words in lists.items() if frozenset(words) != _extra_words[name]}
+        if not changed:
+            return []
+
+        new_extra_words = {**_extra_words, **changed}
+        # only rebuild what's been loaded already, the rest picks the new words up when it's first used
+        rebuilt = {}
+        for name in changed:
+            resource, builder = _DEPENDENTS[name]
+            if resource in _resources:
+                rebuilt[resource] = builder(new_extra_words)
+
+        with _resource_lock:
+            _extra_words = new_extra_words
+            for name in changed:
+                resource, _ = _DEPENDENTS[name]
+                if resource not in rebuilt:
+                    # first loaded while the others were being rebuilt, with the old words
+                    _resources.pop(resource, None)
+            _resources.update(rebuilt)
+            bump_word_list_version()
+    return list(changed)
+
+
+def extra_words() -> dict[str, frozenset[str]]:
+    return dict(_extra_words)
+
+
+def predict(texts: list[str]):
+    return get_predict()(texts)
+
+
+def warm_up() -> dict[str, float]:
+    """load every resource now instead of on first use, returns how long each one took to load (see `load_timings`)"""
+    get_predict()
+    get_model_bound()
+    get_english_words()
+    get_longlist_automaton()
+    get_blacklist_index()
+    return load_timings()
+
+
+def load_timings() -> dict[str, float]:
+    """seconds it took to load each resource that has been loaded so far"""
+    with _resource_lock:
+        return dict(_load_timings)
+
+
+def __getattr__(name: str) -> Any:
+    # old module level names, now loaded on first access
+    if name == "_longlist":
+        return get_longlist()
+    if name == "english_words_list":
+        return get_english_words()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# bumped whenever a default word list changes, so caches built on top of the lists know to drop their entries
+_word_list_version = 0
+
+
+def word_list_version() -> int:
+    return _word_list_version
+
+
+def bump_word_list_version() -> int:
+    global _word_list_version
+    _word_list_version += 1
+    return _word_list_version
+
+
+def _mark_word_neighbors(tokens: list[str], hits: list[int], censored: list[bool], neighbors: int) -> None:
+    """mark every hit word plus `neighbors` words on each side of it (separators don't count)"""
+    n = len(tokens)
+    for i in hits:
+        if not tokens[i].isalnum():
+            continue
+        censored[i] = True
+
+        j = i
+        seen = 0
+        while j > 0 and seen < neighbors:
+            j -= 1
+            if tokens[j].isalnum():
+                censored[j] = True
+                seen += 1
+
+        j = i
+        seen = 0
+        while j < n - 1 and seen < neighbors:
+            j += 1
+            if tokens[j].isalnum():
+                censored[j] = True
+                seen += 1
 
 
 class ProfanityFilter:
+    token_cache: LRUCache | None
+    """per-token verdicts of the expensive part of the filter. None disables it"""
+
+    def __init__(self, token_cache_size: int = 8192):
+        self.token_cache = LRUCache(token_cache_size) if token_cache_size > 0 else None
+
+    def _token_verdict(self, token: str, matcher: Hashable, check: Callable[[str], bool]) -> bool:
+        """
+        `check(token)`, remembered per token, matcher (compiled word list) and word list version
+
+        tokens like "the", player names or item names repeat across thousands of messages
+        """
+        if self.token_cache is None:
+            return check(token)
+
+        if isinstance(matcher, WordList):
+            matcher = matcher.cache_key
+        key = (token, matcher, _word_list_version)
+        verdict = self.token_cache.get(key)
+        if verdict is None:
+            verdict = check(token)
+            self.token_cache.put(key, verdict)
+        return verdict
+
+    def token_cache_stats(self) -> dict[str, float]:
+        if self.token_cache is None:
+            return {}
+        return self.token_cache.stats()
+
+    def scan_tokens(
+        self,
+        tokens: list[str],
+        word_list: set[str] | WordList | None = None,
+        allowed_words_list: set[str] | WordList | None = None,
+    ) -> list[int] | None:
+        """
+        scan already split tokens (from `split_into_tokens`)
+
+        returns None if the tokens are clean, otherwise the (possibly empty) list of indices of the tokens that caused it
+        """
+        raise NotImplementedError
+
+    def mark_censored(
+        self,
+        tokens: list[str],
+        hits: list[int],
+        censored: list[bool],
+        neighbors: int = 1,
+    ) -> None:
+        """mark the tokens that should be censored for the given hits in a shared censor mask"""
+        raise NotImplementedError
+
     def is_profane(
         self,
         text: str,
-        word_list: set[str] | None = None,
-        allowed_words_list: set[str] | None = None,
+        word_list: set[str] | WordList | None = None,
+        allowed_words_list: set[str] | WordList | None = None,
     ) -> bool:
-        raise NotImplementedError
+        return self.scan_tokens(split_into_tokens(text), word_list, allowed_words_list) is not None
 
     def censor(
         self,
         text: str,
         replacement: str = "#",
         neighbors: int = 1,
-        word_list: set[str] | None = None,
-        allowed_words_list: set[str] | None = None,
+        word_list: set[str] | WordList | None = None,
+        allowed_words_list: set[str] | WordList | None = None,
     ) -> str:
-        raise NotImplementedError
+        spans = tokenize_spans(text)
+        tokens = [span[3] for span in spans]
+        censored = [False] * len(tokens)
+
+        hits = self.scan_tokens(tokens, word_list, allowed_words_list)
+        if hits:
+            self.mark_censored(tokens, hits, censored, neighbors)
+
+        return render_spans(text, spans, censored, replacement)
 
 
 class ProfanityExtraList(ProfanityFilter):
-    def is_profane(self, text: str, word_list=None, allowed_words_list=None) -> bool:
-        tokens = [t.lower() for t in split_into_tokens(text)]
-        blocked = word_list if word_list is not None else blacklist
-        allowed = allowed_words_list if allowed_words_list is not None else whitelist
-
-        for token in tokens:
-            if token in allowed or token in english_words_list:
-                continue
-
-            for bad in blocked:
-                if levenshtein(token, bad) <= max(1, len(bad) // 1.3):
-                    return True
-
-                if abs(len(token) - len(bad)) <= 5:
-                    for i in range(len(token) - len(bad) + 1):
-                        if levenshtein(token[i:i + len(bad)], bad) <= max(1, len(bad) // 2):
-                            return True
-        return False
-
-    def censor(self, text: str, replacement="#", neighbors=1, word_list=None, allowed_words_list=None) -> str:
-        tokens = split_into_tokens(text)
-        lowered = [t.lower() for t in tokens]
-        n = len(tokens)
-        censored = [False] * n
-
-        for i, tok in enumerate(tokens):
-            if tok.isalnum() and self.is_profane(tok, word_list, allowed_words_list):
-                censored[i] = True
-
-                j = i
-                seen = 0
-                while j > 0 and seen < neighbors:
-                    j -= 1
-                    if lowered[j].isalnum():
-                        censored[j] = True
-                        seen += 1
-
-                j = i
-                seen = 0
-                while j < n - 1 and seen < neighbors:
-                    j += 1
-                    if lowered[j].isalnum():
-                        censored[j] = True
-                        seen += 1
-
-        return "".join(
-            replacement * len(t) if censored[i] and lowered[i].isalnum() else t
-            for i, t in enumerate(tokens)
-        )
+    def scan_tokens(self, tokens, word_list=None, allowed_words_list=None) -> list[int] | None:
+        allowed = allowed_words_list if allowed_words_list is not None else get_whitelist()
+        if word_list is None:
+            index = get_blacklist_index()
+        elif isinstance(word_list, WordList):
+            index = word_list
+        else:
+            index = get_fuzzy_index(word_list)
+        english_words_list = get_english_words()
+
+        hits = [
+            i
+            for i, token in enumerate(tokens)
+            if token not in allowed
+            and token not in english_words_list
+            and self._token_verdict(token, index, index.matches)
+        ]
+        return hits or None
+
+    def mark_censored(self, tokens, hits, censored, neighbors=1) -> None:
+        _mark_word_neighbors(tokens, hits, censored, neighbors)
 
 
 class ProfanityList(ProfanityFilter):
-    def is_profane(self, text: str, word_list=None, *_args, **_kwargs) -> bool:
-        tokens = [t.lower() for t in split_into_tokens(text)]
-        blocked = word_list if word_list is not None else _longlist
+    def scan_tokens(self, tokens, word_list=None, *_args, **_kwargs) -> list[int] | None:
+        if word_list is None:
+            matcher = get_longlist_automaton()
+        elif isinstance(word_list, WordList):
+            matcher = word_list
+        else:
+            matcher = get_automaton(word_list)
+        hits = [i for i, token in enumerate(tokens) if self._token_verdict(token, matcher, matcher.contains_any)]
+        return hits or None
 
-        for token in tokens:
-            for bad in blocked:
-                if bad in token:
-                    return True
-        return False
+    def mark_censored(self, tokens, hits, censored, neighbors=1) -> None:
+        # the longlist only censors the matched word itself by default
+        _mark_word_neighbors(tokens, hits, censored, neighbors - 1)
+
+    def is_profane(self, text: str, word_list=None, *_args, **_kwargs) -> bool:
+        return super().is_profane(text, word_list)
 
     def censor(self, text: str, replacement="#", neighbors=1, word_list=None, *_args, **_kwargs) -> str:
-        tokens = split_into_tokens(text)
-        lowered = [t.lower() for t in tokens]
-        n = len(tokens)
-        censored = [False] * n
-
-        blocked = word_list if word_list is not None else _longlist
-
-        for i, tok in enumerate(lowered):
-            for bad in blocked:
-                if bad in tok:
-                    censored[i] = True
-
-                    j = i
-                    seen = 0
-                    while j > 0 and seen < neighbors - 1:
-                        j -= 1
-                        if lowered[j].isalnum():
-                            censored[j] = True
-                            seen += 1
-
-                    j = i
-                    seen = 0
-                    while j < n - 1 and seen < neighbors - 1:
-                        j += 1
-                        if lowered[j].isalnum():
-                            censored[j] = True
-                            seen += 1
-                    break
-
-        return "".join(
-            replacement * len(t) if censored[i] and lowered[i].isalnum() else t
-            for i, t in enumerate(tokens)
-        )
+        return super().censor(text, replacement, neighbors, word_list)
 
 
 class ProfanityCheck(ProfanityFilter):
-    def is_profane(self, text: str, *_args, **_kwargs) -> bool:
-        return bool(predict(["".join(split_into_tokens(text))])[0])
+    window_size = 1
 
-    def censor(self, text: str, replacement="#", neighbors=1, window_size=1, *_args, **_kwargs) -> str:
-        tokens = split_into_tokens(text)
-        lowered = [t.lower() for t in tokens]
-        n = len(tokens)
+    def __init__(self, batcher: PredictBatcher | None = None, token_cache_size: int = 0, prefilter: Prefilter | None = None):
+        # ML verdicts depend on the whole message, so there's nothing to cache per token by default
+        super().__init__(token_cache_size)
+        # when set, predictions from concurrent callers get batched together
+        self.batcher = batcher
+        # messages the prefilter proves clean don't go through the model at all, it only
+        # skips what the model would pass anyway
+        self.prefilter = prefilter if prefilter is not None else Prefilter(get_model_bound)
+
+    def enable_batching(self, max_batch: int = 256, max_wait: float = 0.0) -> PredictBatcher:
+        """batch predictions from concurrent callers together (see PredictBatcher)"""
+        self.batcher = PredictBatcher(predict, max_batch=max_batch, max_wait=max_wait)
+        return self.batcher
+
+    def _predict(self, texts: list[str]) -> list[int]:
+        if self.batcher is not None:
+            return self.batcher.predict(texts)
+        return [int(flag) for flag in predict(texts)]
 
-        windows = [" ".join(lowered[i:i + window_size]) for i in range(n)]
-        flags = predict(windows)
+    def _predict_messages(self, texts: list[str]) -> list[int]:
+        """predict whole messages, the ones the prefilter proves clean are 0 without predicting them"""
+        if self.prefilter is None:
+            return self._predict(texts)
 
-        censored = [False] * n
-        for i, flag in enumerate(flags):
-            if flag:
-                for j in range(max(0, i - neighbors), min(n, i + window_size + neighbors)):
+        unknown = self.prefilter.unknown(texts)
+        flags = [0] * len(texts)
+        if unknown:
+            for i, flag in zip(unknown, self._predict([texts[i] for i in unknown])):
+                flags[i] = flag
+        return flags
+
+    def _windows(self, tokens: list[str], window_size: int) -> list[str]:
+        return [" ".join(tokens[i:i + window_size]) for i in range(len(tokens))]
+
+    def scan_tokens(self, tokens, *_args, window_size=None, **_kwargs) -> list[int] | None:
+        text = "".join(tokens)
+        if self.prefilter is not None and self.prefilter.is_clean(text):
+            return None
+
+        # the whole message and every window go through a single predict call
+        flags = self._predict([text] + self._windows(tokens, window_size or self.window_size))
+        if not flags[0]:
+            return None
+        return [i for i, flag in enumerate(flags[1:]) if flag]
+
+    def scan_tokens_many(self, token_lists: list[list[str]], window_size=None) -> list[list[int] | None]:
+        """
+        same as scan_tokens for several messages, with one predict call for all of the whole
+        messages and one more for the windows of the ones that were flagged
+        """
+        flagged = [i for i, flag in enumerate(self._predict_messages(["".join(tokens) for tokens in token_lists])) if flag]
+        results: list[list[int] | None] = [None] * len(token_lists)
+        if not flagged:
+            return results
+
+        window_size = window_size or self.window_size
+        windows = [self._windows(token_lists[i], window_size) for i in flagged]
+        flags = self._predict([window for message_windows in windows for window in message_windows])
+
+        offset = 0
+        for i, message_windows in zip(flagged, windows):
+            results[i] = [j for j, flag in enumerate(flags[offset:offset + len(message_windows)]) if flag]
+            offset += len(message_windows)
+        return results
+
+    def mark_censored(self, tokens, hits, censored, neighbors=1, window_size=None) -> None:
+        window_size = window_size or self.window_size
+        n = len(tokens)
+        for i in hits:
+            for j in range(max(0, i - neighbors), min(n, i + window_size + neighbors)):
+                if tokens[j].strip():
                     censored[j] = True
 
-        return "".join(
-            replacement * len(t) if censored[i] and t.strip() else t
-            for i, t in enumerate(tokens)
-        )
+    def is_profane(self, text: str, *_args, **_kwargs) -> bool:
+        return bool(self._predict_messages(["".join(split_into_tokens(text))])[0])
+
+    def is_profane_many(self, texts: list[str]) -> list[bool]:
+        """check several messages with one predict call"""
+        return [bool(flag) for flag in self._predict_messages(["".join(split_into_tokens(text)) for text in texts])]
+
+    def censor(self, text: str, replacement="#", neighbors=1, window_size=1, *_args, **_kwargs) -> str:
+        spans = tokenize_spans(text)
+        tokens = [span[3] for span in spans]
+        censored = [False] * len(tokens)
+
+        flags = self._predict(self._windows(tokens, window_size))
+        self.mark_censored(tokens, [i for i, flag in enumerate(flags) if flag], censored, neighbors, window_size)
+
+        return render_spans(text, spans, censored, replacement)
@@ -0,0 +1,184 @@
+import threading
+import time
+from typing import NamedTuple
+
+
+class TokenBucket:
+    """
+    allows bursts of up to `capacity` messages, refilling at `rate` messages per second
+
+    `rate <= 0` disables the bucket (everything is allowed)
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float | None = None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def can_take(self, now: float, cost: float = 1.0) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill(now)
+        return self.tokens >= cost
+
+    def take(self, now: float, cost: float = 1.0) -> None:
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens -= cost
+
+    def retry_after(self, now: float, cost: float = 1.0) -> float:
+        """seconds until `cost` tokens are available"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+
+class SlidingWindowCounter:
+    """
+    allows at most `limit` messages in any `window` seconds
+
+    approximated with the counts of the current and previous fixed windows, weighted by
+    how much of the previous window still overlaps, so it's O(1) in time and memory.
+    `limit <= 0` disables it
+    """
+
+    __slots__ = ("limit", "window", "window_start", "current", "previous")
+
+    def __init__(self, limit: int, window: float, now: float | None = None):
+        self.limit = limit
+        self.window = max(0.001, window)
+        self.window_start = time.monotonic() if now is None else now
+        self.current = 0
+        self.previous = 0
+
+    def _advance(self, now: float) -> None:
+        elapsed = now - self.window_start
+        if elapsed < self.window:
+            return
+        windows = int(elapsed // self.window)
+        self.previous = self.current if windows == 1 else 0
+        self.current = 0
+        self.window_start += windows * self.window
+
+    def count(self, now: float) -> float:
+        self._advance(now)
+        overlap = 1.0 - (now - self.window_start) / self.window
+        return self.previous * overlap + self.current
+
+    def can_take(self, now: float) -> bool:
+        return self.limit <= 0 or self.count(now) + 1 <= self.limit
+
+    def take(self, now: float) -> None:
+        if self.limit > 0:
+            self._advance(now)
+            self.current += 1
+
+    def retry_after(self, now: float) -> float:
+        if self.limit <= 0 or self.can_take(now):
+            return 0.0
+        # the previous window's weight has to drop far enough, or the current window has to end
+        excess = self.count(now) + 1 - self.limit
+        if self.previous > 0 and excess <= self.previous:
+            return excess / self.previous * self.window
+        return self.window_start + self.window - now
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: str | None
+    """which limit rejected the message: "player", "window" or "global" (None if allowed)"""
+    retry_after: float
+    """seconds until the message would be allowed"""
+
+
+_ALLOWED = RateLimitResult(True, None, 0.0)
+
+
+class RateLimiter:
+    """
+    chat rate limits: a token bucket and a sliding window per player, and a token bucket
+    for the whole server that protects the filters during raids
+
+    a message only uses up capacity when every limit allows it. state is O(1) per player,
+    and `forget` should be called when a player leaves
+    """
+
+    def __init__(
+        self,
+        player_rate: float = 2.0,
+        player_burst: float = 3.0,
+        window_limit: int = 20,
+        window_seconds: float = 30.0,
+        global_rate: float = 50.0,
+        global_burst: float = 100.0,
+    ):
+        self.player_rate = player_rate
+        self.player_burst = player_burst
+        self.window_limit = window_limit
+        self.window_seconds = window_seconds
+
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._players: dict[str, tuple[TokenBucket, SlidingWindowCounter]] = {}
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.rejected: dict[str, int] = {"player": 0, "window": 0, "global": 0}
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def check(self, key: str, now: float | None = None) -> RateLimitResult:
+        """check a message from the player `key` against every limit, and count it if it's allowed"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            limits = self._players.get(key)
+            if limits is None:
+                limits = self._players[key] = (
+                    TokenBucket(self.player_rate, self.player_burst, now),
+                    SlidingWindowCounter(self.window_limit, self.window_seconds, now),
+                )
+            bucket, window = limits
+
+            if not bucket.can_take(now):
+                result = RateLimitResult(False, "player", bucket.retry_after(now))
+            elif not window.can_take(now):
+                result = RateLimitResult(False, "window", window.retry_after(now))
+            elif not self.global_bucket.can_take(now):
+                result = RateLimitResult(False, "global", self.global_bucket.retry_after(now))
+            else:
+                bucket.take(now)
+                window.take(now)
+                self.global_bucket.take(now)
+                self.allowed += 1
+                return _ALLOWED
+
+            self.rejected[result.limit] += 1  # type: ignore[index]
+            return result
+
+    def allow(self, key: str, now: float | None = None) -> bool:
+        return self.check(key, now).allowed
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._players.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._players.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "tracked_players": len(self._players),
+                "allowed": self.allowed,
+                **{f"rejected_{limit}": count for limit, count in self.rejected.items()},
+            }
@@ -0,0 +1,127 @@
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable
+
+
+class WatchedFile:
+    """a file's last seen stat and content hash"""
+
+    __slots__ = ("path", "callback", "stat", "digest")
+
+    def __init__(self, path: Path, callback: Callable[[Path], None]):
+        self.path = path
+        self.callback = callback
+        self.stat = _stat(path)
+        self.digest = _digest(path) if self.stat is not None else None
+
+    def poll(self) -> bool:
+        """whether the file's contents changed since the last poll"""
+        stat = _stat(self.path)
+        if stat == self.stat:
+            return False
+        self.stat = stat
+
+        # the mtime or size changed, only hash the file now to skip touches and same-content saves
+        digest = _digest(self.path) if stat is not None else None
+        if digest == self.digest:
+            return False
+        self.digest = digest
+        return True
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _digest(path: Path) -> bytes | None:
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 16):
+                digest.update(chunk)
+        return digest.digest()
+    except OSError:
+        return None
+
+
+class FileWatcher:
+    """
+    polls files for changes in a background thread and calls their callbacks
+
+    every `interval` seconds each file is stat()ed, and only hashed when its mtime or size
+    changed, so watching costs almost nothing while nothing changes. callbacks run in the
+    watcher's thread, one at a time, and an exception in one doesn't stop the watcher
+    """
+
+    def __init__(self, interval: float = 2.0, on_error: Callable[[Path, Exception], None] | None = None):
+        self.interval = interval
+        self.on_error = on_error
+
+        self._files: dict[Path, WatchedFile] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def watch(self, path: Path | str, callback: Callable[[Path], None]) -> None:
+        """call `callback(path)` whenever the file's contents change (including being created or deleted)"""
+        path = Path(path)
+        with self._lock:
+            self._files[path] = WatchedFile(path, callback)
+
+    def unwatch(self, path: Path | str) -> None:
+        with self._lock:
+            self._files.pop(Path(path), None)
+
+    def poll(self) -> list[Path]:
+        """check every file once, calling the callbacks of changed ones. returns the changed files"""
+        with self._lock:
+            watched = list(self._files.values())
+
+        changed = []
+        for file in watched:
+            if not file.poll():
+                continue
+            changed.append(file.path)
+            try:
+                file.callback(file.path)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(file.path, e)
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="breeze-file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+def read_word_list(path: Path) -> set[str]:
+    """words of a word list file: one per line, lowercased, blank lines and lines starting with # are skipped"""
+    try:
+        text = path.read_text(encoding="utf-8", errors="replace")
+    except FileNotFoundError:
+        return set()
+
+    words = set()
+    for line in text.splitlines():
+        word = line.strip().lower()
+        if word and not word.startswith("#"):
+            words.add(word)
+    return words
@@ -0,0 +1,246 @@
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from .player_state import PlayerStateStore
+
+_MASK = (1 << 64) - 1
+_BANDS = 8
+_BAND_BITS = 64 // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# simhash keeps one 8-bit counter per fingerprint bit, packed into one big int (a "lane" per bit).
+# a feature's hash is turned into lanes by writing it as 64 "0"/"1" bytes and mapping those to 0/1
+_TO_LANES = bytes.maketrans(b"01", b"\x00\x01")
+# after biasing the counters, a lane >= 128 means the bit is set
+_LANE_TO_BIT = bytes(ord("1") if i >= 128 else ord("0") for i in range(256))
+_ONE_PER_LANE = int.from_bytes(b"\x01" * 64, "big")
+_MAX_FEATURES = 255
+
+_lanes_cache: dict[str, int] = {}
+
+
+def _features(text: str) -> list[str]:
+    """character trigrams of a message, ignoring case, punctuation and spacing differences"""
+    compact = _NON_WORD.sub(" ", text.casefold()).strip()
+    return [compact[i:i + 3] for i in range(max(1, len(compact) - 2))][:_MAX_FEATURES]
+
+
+def _lanes(feature: str) -> int:
+    lanes = _lanes_cache.get(feature)
+    if lanes is None:
+        if len(_lanes_cache) > 65536:
+            _lanes_cache.clear()
+        lanes = _lanes_cache[feature] = int.from_bytes(
+            format(hash(feature) & _MASK, "064b").encode().translate(_TO_LANES), "big"
+        )
+    return lanes
+
+
+# the handler fingerprints a message for the spam check and again when it's recorded in the player's state
+@lru_cache(maxsize=1024)
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of a message
+
+    messages that only differ a little get fingerprints that only differ in a few bits,
+    so near-duplicates can be found by Hamming distance
+    """
+    features = _features(text)
+    counts = sum(map(_lanes, features))
+    # a bit is set when more than half of the features have it
+    counts += (128 - (len(features) // 2 + 1)) * _ONE_PER_LANE
+    return int(counts.to_bytes(64, "big").translate(_LANE_TO_BIT), 2)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class FingerprintWindow:
+    """
+    rolling window of message fingerprints, for counting near-duplicates of a new message
+
+    fingerprints are indexed by 8 bands of 8 bits, and only fingerprints sharing a band
+    with the new one are compared. fingerprints within 7 bits of each other always share
+    one, ones within 8-10 bits still do about 9 out of 10 times
+    """
+
+    def __init__(self, max_size: int = 2048, window_seconds: float = 30.0, max_distance: int = 8):
+        self.max_size = max(1, max_size)
+        self.window_seconds = window_seconds
+        self.max_distance = max_distance
+
+        self._entries: deque[tuple[float, int]] = deque()
+        # band key -> fingerprint -> how many times it's in the window
+        self._bands: dict[int, dict[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _band_keys(fingerprint: int) -> list[int]:
+        return [(band << _BAND_BITS) | ((fingerprint >> (band * _BAND_BITS)) & _BAND_MASK) for band in range(_BANDS)]
+
+    def _expire(self, now: float) -> None:
+        entries = self._entries
+        cutoff = now - self.window_seconds
+        while entries and (entries[0][0] < cutoff or len(entries) > self.max_size):
+            _, fingerprint = entries.popleft()
+            for key in self._band_keys(fingerprint):
+                bucket = self._bands[key]
+                if bucket[fingerprint] <= 1:
+                    del bucket[fingerprint]
+                    if not bucket:
+                        del self._bands[key]
+                else:
+                    bucket[fingerprint] -= 1
+
+    def count_similar(self, fingerprint: int, now: float, limit: int) -> int:
+        """how many fingerprints in the window are near `fingerprint`, counting at most up to `limit`"""
+        self._expire(now)
+        max_distance = self.max_distance
+        seen = set()
+        count = 0
+        for key in self._band_keys(fingerprint):
+            for other, times in self._bands.get(key, {}).items():
+                if other in seen:
+                    continue
+                seen.add(other)
+                if (fingerprint ^ other).bit_count() <= max_distance:
+                    count += times
+                    if count >= limit:
+                        return count
+        return count
+
+    def add(self, fingerprint: int, now: float) -> None:
+        self._entries.append((now, fingerprint))
+        for key in self._band_keys(fingerprint):
+            bucket = self._bands.setdefault(key, {})
+            bucket[fingerprint] = bucket.get(fingerprint, 0) + 1
+        self._expire(now)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bands.clear()
+
+
+class SpamVerdict(NamedTuple):
+    is_spam: bool
+    scope: str | None
+    """"player" if the player keeps repeating themselves, "global" if many players send the same thing"""
+    similar: int
+    """how many near-duplicates were found in that window"""
+
+
+_NOT_SPAM = SpamVerdict(False, None, 0)
+
+
+class SpamDetector:
+    """
+    flags messages that are near-duplicates of recent ones, before they're filtered
+
+    compares a message's SimHash fingerprint with the player's latest messages, and with
+    everyone's messages in the last `window_seconds`. a message is spam if the player already
+    sent `player_threshold` similar ones recently, or everyone together already sent
+    `global_threshold` (copy-pasted spam from many bot accounts), so the one after that is the
+    first that's dropped. messages shorter than `min_length` are never spam
+
+    players' latest messages are read from `store` (see PlayerState.recent_messages), whoever owns
+    it records every message there, and has to remember at least `player_threshold` of them per
+    player or the player check can never trigger. without one, the detector keeps its own store
+    of the last `player_history` (at least `player_threshold`) messages of each player and records
+    the messages it checks itself
+    """
+
+    def __init__(
+        self,
+        player_threshold: int = 3,
+        global_threshold: int = 8,
+        window_seconds: float = 30.0,
+        max_distance: int = 8,
+        player_history: int = 8,
+        global_size: int = 2048,
+        min_length: int = 8,
+        store: "PlayerStateStore | None" = None,
+    ):
+        self.player_threshold = player_threshold
+        self.global_threshold = global_threshold
+        self.window_seconds = window_seconds
+        self.max_distance = max_distance
+        self.player_history = max(1, player_history, player_threshold)
+        self.min_length = min_length
+
+        self.global_window = FingerprintWindow(global_size, window_seconds, max_distance)
+        self._records_messages = store is None
+        if store is None:
+            from .player_state import PlayerStateStore
+
+            store = PlayerStateStore(history=self.player_history)
+        self.store = store
+        self._lock = threading.Lock()
+
+        self.checked = 0
+        self.flagged: dict[str, int] = {"player": 0, "global": 0}
+
+    def check(self, key: str, message: str, now: float | None = None) -> SpamVerdict:
+        """check a message from the player `key` (and remember it, if the detector has its own store)"""
+        if len(message.strip()) < self.min_length:
+            return _NOT_SPAM
+
+        now = time.monotonic() if now is None else now
+        fingerprint = simhash(message)
+
+        with self._lock:
+            self.checked += 1
+
+            state = self.store.get(key)
+            player_similar = 0
+            if self.player_threshold > 0:
+                player_similar = 1
+                if state is not None:
+                    player_similar += state.similar_since(fingerprint, now - self.window_seconds, self.max_distance)
+            if self._records_messages:
+                (state or self.store.add(key)).record_message(message, now)
+
+            global_similar = 0
+            if self.global_threshold > 0:
+                global_similar = self.global_window.count_similar(fingerprint, now, self.global_threshold) + 1
+            self.global_window.add(fingerprint, now)
+
+            if self.player_threshold > 0 and player_similar > self.player_threshold:
+                verdict = SpamVerdict(True, "player", player_similar)
+            elif self.global_threshold > 0 and global_similar > self.global_threshold:
+                verdict = SpamVerdict(True, "global", global_similar)
+            else:
+                return _NOT_SPAM
+
+            self.flagged[verdict.scope] += 1  # type: ignore[index]
+            return verdict
+
+    def forget(self, key: str) -> None:
+        # a shared store's players are removed by its owner
+        if self._records_messages:
+            with self._lock:
+                self.store.remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._records_messages:
+                self.store.clear()
+            self.global_window.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "tracked_players": len(self.store),
+                "global_window": len(self.global_window),
+                "checked": self.checked,
+                **{f"flagged_{scope}": count for scope, count in self.flagged.items()},
+            }
@@ -0,0 +1,198 @@
+import threading
+from typing import Iterable, Iterator
+
+from .aho_corasick import AhoCorasick
+from .fuzzy_index import FuzzyIndex
+
+
+def _normalize(word: str) -> str:
+    return word.strip().lower()
+
+
+class WordList:
+    """
+    a word list that can be changed while it's in use, for `censor_with_word_list`
+
+    passing a new set every time a word is banned means the matchers built from it (fuzzy
+    index, substring automaton) are rebuilt from scratch. a WordList keeps its matchers
+    and updates them in place instead:
+
+    - the fuzzy index only touches the bucket of the word's length
+    - the substring automaton stays as it is, words added since it was built are looked
+      for one by one (so every pending word costs each lookup a substring search) and
+      removed ones are skipped when they match. once more than `compact_after` words
+      changed, a new automaton is built from the whole list. that rebuild runs in the
+      thread that made the change, without holding the list's lock, so lookups keep
+      using the old automaton meanwhile. a change costs amortized O(size / compact_after)
+
+    matchers are only built the first time they're used. every change bumps `version`,
+    so caches of results can key on `(word list, version)` (see `cache_key`)
+    """
+
+    def __init__(self, words: Iterable[str] = (), name: str = "", compact_after: int = 32):
+        self.name = name
+        self.compact_after = max(1, compact_after)
+
+        self._words = {word for word in map(_normalize, words) if word}
+        self._version = 0
+        self._lock = threading.RLock()
+
+        self._index: FuzzyIndex | None = None
+        # substring matching: the automaton last compacted, plus what changed since
+        self._automaton: AhoCorasick | None = None
+        self._added: set[str] = set()
+        self._removed: set[str] = set()
+        # while a new automaton is being built: the changes made since its words were taken
+        self._changes_since_snapshot: list[tuple[bool, str]] | None = None
+        # bumped by clear, so an automaton built from the words before it isn't swapped in after it
+        self._generation = 0
+
+        self.compactions = 0
+
+    def __repr__(self) -> str:
+        return f"WordList({self.name!r}, {len(self._words)} words, version {self._version})"
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._words))
+
+    @property
+    def version(self) -> int:
+        """bumped on every change"""
+        return self._version
+
+    @property
+    def cache_key(self) -> tuple["WordList", int]:
+        """changes whenever the list does, for keying cached results on"""
+        return (self, self._version)
+
+    def add(self, word: str) -> bool:
+        """add a word, returns whether it was new"""
+        return self.bulk_update(add=(word,)) > 0
+
+    def remove(self, word: str) -> bool:
+        """remove a word, returns whether it was in the list"""
+        return self.bulk_update(remove=(word,)) > 0
+
+    def bulk_update(self, add: Iterable[str] = (), remove: Iterable[str] = ()) -> int:
+        """add and remove many words with one version bump, returns how many words changed"""
+        with self._lock:
+            changed = 0
+            for word in map(_normalize, remove):
+                if word in self._words:
+                    self._words.discard(word)
+                    self._on_removed(word)
+                    changed += 1
+            for word in map(_normalize, add):
+                if word and word not in self._words:
+                    self._words.add(word)
+                    self._on_added(word)
+                    changed += 1
+
+            if not changed:
+                return 0
+            self._version += 1
+            compact = (
+                self._automaton is not None
+                and self._changes_since_snapshot is None
+                and len(self._added) + len(self._removed) > self.compact_after
+            )
+            if compact:
+                snapshot = frozenset(self._words)
+                generation = self._generation
+                self._changes_since_snapshot = []
+
+        if compact:
+            self._compact(snapshot, generation)
+        return changed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._changes_since_snapshot = None
+            self._words.clear()
+            self._index = None
+            self._automaton = None
+            self._added.clear()
+            self._removed.clear()
+            self._version += 1
+
+    def _on_added(self, word: str) -> None:
+        if self._index is not None:
+            self._index.add(word)
+        if self._changes_since_snapshot is not None:
+            self._changes_since_snapshot.append((True, word))
+        if self._automaton is not None:
+            if word in self._removed:
+                # still in the compacted automaton
+                self._removed.discard(word)
+            else:
+                self._added.add(word)
+
+    def _on_removed(self, word: str) -> None:
+        if self._index is not None:
+            self._index.discard(word)
+        if self._changes_since_snapshot is not None:
+            self._changes_since_snapshot.append((False, word))
+        if self._automaton is not None:
+            if word in self._added:
+                self._added.discard(word)
+            else:
+                self._removed.add(word)
+
+    def _compact(self, snapshot: frozenset[str], generation: int) -> None:
+        """build an automaton from `snapshot` outside the lock, then swap it in with the changes made meanwhile"""
+        try:
+            automaton = AhoCorasick(snapshot)
+        except BaseException:
+            with self._lock:
+                if self._generation == generation:
+                    self._changes_since_snapshot = None
+            raise
+
+        with self._lock:
+            if self._generation != generation:
+                # cleared while building
+                return
+            added: set[str] = set()
+            removed: set[str] = set()
+            for is_added, word in self._changes_since_snapshot or ():
+                if is_added:
+                    if word in removed:
+                        removed.discard(word)
+                    else:
+                        added.add(word)
+                elif word in added:
+                    added.discard(word)
+                else:
+                    removed.add(word)
+            self._automaton = automaton
+            self._added = added
+            self._removed = removed
+            self._changes_since_snapshot = None
+            self.compactions += 1
+
+    def matches(self, token: str) -> bool:
+        """whether the token is close to a word in the list (see FuzzyIndex.matches)"""
+        with self._lock:
+            if self._index is None:
+                self._index = FuzzyIndex(self._words)
+            return self._index.matches(token)
+
+    def contains_any(self, text: str) -> bool:
+        """whether any word in the list occurs in the text"""
+        with self._lock:
+            if self._automaton is None:
+                self._automaton = AhoCorasick(self._words)
+            if self._added and any(word in text for word in self._added):
+                return True
+            if not self._removed:
+                return self._automaton.contains_any(text)
+            removed = self._removed
+            return any(pattern not in removed for _, _, pattern in self._automaton.iter_matches(text))
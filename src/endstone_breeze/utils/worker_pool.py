@@ -0,0 +1,138 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class ModerationPool:
+    """
+    runs moderation work off the server thread
+
+    at most `queue_size` jobs can be queued or running at once. once it's full,
+    `submit` refuses new jobs instead of letting the backlog (and chat delay) grow,
+    and the caller decides what to do with the message
+
+    jobs submitted with the same `key` run one after another in submission order, so
+    one player's messages are finished (and broadcast) in the order they were sent
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 256):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="breeze-moderation")
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # key -> jobs waiting for the running job with the same key to finish
+        self._serial: dict[Any, deque[Callable[[], None]]] = {}
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(
+        self,
+        job: Callable[[], Any],
+        on_done: Callable[[Any], None],
+        on_error: Callable[[Exception], None] | None = None,
+        key: Any = None,
+    ) -> bool:
+        """
+        run `job` on a worker thread and pass its result to `on_done` (also on the worker thread)
+
+        if `key` is given, the job waits until every earlier job with the same key is done
+
+        returns False without running anything if the queue is full
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+
+        with self._lock:
+            self.submitted += 1
+            self._in_flight += 1
+
+        def run():
+            try:
+                result = job()
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                if on_error is not None:
+                    on_error(e)
+            else:
+                with self._lock:
+                    self.completed += 1
+                on_done(result)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                self._slots.release()
+                if key is not None:
+                    self._run_next(key)
+
+        if key is not None:
+            with self._lock:
+                waiting = self._serial.get(key)
+                if waiting is not None:
+                    # an earlier job with this key is still running, run after it
+                    waiting.append(run)
+                    return True
+                self._serial[key] = deque()
+
+        try:
+            self._executor.submit(run)
+        except RuntimeError:  # pool was shut down
+            with self._lock:
+                self._in_flight -= 1
+                self.submitted -= 1
+                self.rejected += 1
+                if key is not None:
+                    self._serial.pop(key, None)
+            self._slots.release()
+            return False
+        return True
+
+    def _run_next(self, key: Any) -> None:
+        """start the next waiting job with `key`, or forget the key if none is left"""
+        with self._lock:
+            waiting = self._serial.get(key)
+            if not waiting:
+                self._serial.pop(key, None)
+                return
+            run = waiting.popleft()
+        try:
+            self._executor.submit(run)
+        except RuntimeError:  # pool was shut down, drop what's left for this key
+            with self._lock:
+                dropped = 1 + len(self._serial.pop(key, ()))
+                self._in_flight -= dropped
+            for _ in range(dropped):
+                self._slots.release()
+
+    def has_pending(self, key: Any) -> bool:
+        """whether a job with `key` is still queued or running"""
+        with self._lock:
+            return key in self._serial
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
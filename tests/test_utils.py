@@ -0,0 +1,277 @@
+"""
+tests for the pure `endstone_breeze.utils` pieces, they run offline without endstone or wordfreq
+
+    python -m pytest
+"""
+
+import random
+import string
+
+import pytest
+
+from endstone_breeze.utils.fuzzy_index import BKTree, FuzzyIndex, whole_word_distance, window_distance
+from endstone_breeze.utils.general_utils import (
+    PUNCT,
+    SPACE,
+    WORD,
+    bounded_levenshtein,
+    levenshtein,
+    render_spans,
+    split_into_tokens,
+    tokenize_spans,
+)
+from endstone_breeze.utils.rate_limit import SlidingWindowCounter, TokenBucket
+from endstone_breeze.utils.spam import FingerprintWindow, hamming, simhash
+
+MESSAGES = [
+    "",
+    "hello world",
+    "Hello,   World!!",
+    "you f*ck1ng idiot",
+    "f>u>c>k this, a.s.s and sh!t",
+    "café naïve 日本語 mixed with ascii",
+    "tabs\tand\nnewlines  ",
+    "...!!!???",
+    "a-b-c d__e f''g",
+    "x" * 50,
+]
+
+
+def _random_words(rng: random.Random, count: int, alphabet: str = "abcdefg") -> list[str]:
+    return ["".join(rng.choices(alphabet, k=rng.randint(1, 9))) for _ in range(count)]
+
+
+def _brute_force_matches(words: set[str], token: str) -> bool:
+    # FuzzyIndex.matches without any of the pruning
+    n = len(token)
+    for bad in words:
+        if levenshtein(token, bad) <= whole_word_distance(bad):
+            return True
+        length = len(bad)
+        if length <= n <= length + 5:
+            distance = window_distance(bad)
+            if any(levenshtein(token[i:i + length], bad) <= distance for i in range(n - length + 1)):
+                return True
+    return False
+
+
+# tokenizer
+
+@pytest.mark.parametrize("text", MESSAGES)
+def test_tokenize_spans_matches_split_into_tokens(text):
+    assert [span[3] for span in tokenize_spans(text)] == split_into_tokens(text)
+
+
+@pytest.mark.parametrize("text", MESSAGES)
+def test_spans_point_into_the_text(text):
+    end = 0
+    for start, stop, kind, normalized in tokenize_spans(text):
+        assert end <= start < stop <= len(text)
+        raw = text[start:stop]
+        if kind == WORD:
+            assert normalized in (raw.lower(), "".join(c for c in raw if c.isalnum()).lower())
+        else:
+            assert kind in (SPACE, PUNCT)
+            assert normalized == raw
+        end = stop
+    # only leftover word characters are outside of the spans
+    covered = {i for start, stop, *_ in tokenize_spans(text) for i in range(start, stop)}
+    assert all(text[i].isalnum() or text[i] == "_" for i in range(len(text)) if i not in covered)
+
+
+def test_render_spans_censors_in_place():
+    text = "you f*ck1ng idiot"
+    spans = tokenize_spans(text)
+    censored = [span[3] == "f*ck1ng" for span in spans]
+    assert render_spans(text, spans, censored) == "you ####### idiot"
+
+
+# edit distance
+
+def test_bounded_levenshtein_matches_full_dp():
+    rng = random.Random(1)
+    for _ in range(2000):
+        a = "".join(rng.choices("abcd", k=rng.randint(0, 12)))
+        b = "".join(rng.choices("abcd", k=rng.randint(0, 12)))
+        full = levenshtein(a, b)
+        for max_distance in range(-1, 8):
+            expected = full if full <= max_distance else max_distance + 1
+            assert bounded_levenshtein(a, b, max_distance) == expected, (a, b, max_distance)
+
+
+def test_bounded_levenshtein_long_strings():
+    # wider than a machine word, so the bit vectors are multi-limb ints
+    rng = random.Random(2)
+    a = "".join(rng.choices(string.ascii_lowercase, k=90))
+    b = "".join(rng.choices(string.ascii_lowercase, k=80))
+    assert bounded_levenshtein(a, b, 200) == levenshtein(a, b)
+
+
+# fuzzy index
+
+def test_fuzzy_index_matches_brute_force():
+    rng = random.Random(3)
+    words = set(_random_words(rng, 60))
+    index = FuzzyIndex(words)
+    for token in _random_words(rng, 300) + ["", "abcdefgabcdefg"]:
+        assert index.matches(token) == _brute_force_matches(words, token), token
+
+
+def test_fuzzy_index_add_discard_matches_fresh_index():
+    rng = random.Random(4)
+    words = set(_random_words(rng, 40))
+    index = FuzzyIndex(words)
+    tokens = _random_words(rng, 150)
+
+    for step in range(200):
+        word = _random_words(rng, 1)[0]
+        if step % 3 and words:
+            word = rng.choice(sorted(words))
+            assert index.discard(word)
+            assert not index.discard(word)
+            words.discard(word)
+        else:
+            assert index.add(word) == (word not in words)
+            words.add(word)
+
+        if step % 20 == 0:
+            fresh = FuzzyIndex(words)
+            assert len(index) == len(fresh) == len(words)
+            assert [index.matches(token) for token in tokens] == [fresh.matches(token) for token in tokens]
+
+
+def test_fuzzy_index_empty_after_discarding_everything():
+    index = FuzzyIndex(["bad", "worse"])
+    assert index.discard("bad") and index.discard("worse")
+    assert len(index) == 0
+    assert not index.matches("bad")
+    assert index.add("bad")
+    assert index.matches("bad")
+
+
+def test_bk_tree_tombstones():
+    rng = random.Random(5)
+    words = set(_random_words(rng, 80))
+    tree = BKTree(words)
+    removed = set(rng.sample(sorted(words), 50))
+    for word in removed:
+        assert tree.discard(word)
+        assert not tree.discard(word)
+    left = words - removed
+    assert len(tree) == len(left)
+    assert set(tree) == left
+
+    for query in _random_words(rng, 100):
+        expected = any(levenshtein(query, word) <= 2 for word in left)
+        assert tree.any_within(query, 2) == expected, query
+
+
+# rate limits
+
+def test_token_bucket_burst_and_refill():
+    bucket = TokenBucket(rate=2.0, capacity=3.0, now=0.0)
+    for _ in range(3):
+        assert bucket.can_take(0.0)
+        bucket.take(0.0)
+    assert not bucket.can_take(0.0)
+    assert bucket.retry_after(0.0) == pytest.approx(0.5)
+    assert bucket.can_take(0.5)
+    # refilling never goes past the capacity
+    assert bucket.tokens <= 3.0
+    bucket.take(0.5)
+    assert bucket.can_take(100.0)
+    assert bucket.tokens == pytest.approx(3.0)
+
+
+def test_token_bucket_disabled():
+    bucket = TokenBucket(rate=0.0, capacity=1.0, now=0.0)
+    for _ in range(10):
+        assert bucket.can_take(0.0)
+        bucket.take(0.0)
+    assert bucket.retry_after(0.0) == 0.0
+
+
+def test_sliding_window_counter():
+    window = SlidingWindowCounter(limit=3, window=10.0, now=0.0)
+    for t in (0.0, 1.0, 2.0):
+        assert window.can_take(t)
+        window.take(t)
+    assert not window.can_take(5.0)
+    # at 15s half of the previous window still counts: 3 * 0.5 = 1.5
+    assert window.count(15.0) == pytest.approx(1.5)
+    assert window.can_take(15.0)
+
+    retry = window.retry_after(5.0)
+    assert retry == pytest.approx(5.0 + 10.0 / 3)
+    assert not window.can_take(5.0 + retry - 0.01)
+    assert window.can_take(5.0 + retry + 0.01)
+
+    # after two idle windows nothing is left
+    assert window.count(40.0) == 0
+
+
+def test_sliding_window_counter_disabled():
+    window = SlidingWindowCounter(limit=0, window=1.0, now=0.0)
+    for _ in range(10):
+        assert window.can_take(0.0)
+        window.take(0.0)
+    assert window.retry_after(0.0) == 0.0
+
+
+# spam fingerprints
+
+def test_simhash_near_duplicates():
+    original = simhash("join my server at play.example.net for free stuff")
+    assert hamming(original, simhash("JOIN my server at play.example.net for free stuff!!")) == 0
+    assert hamming(original, simhash("join my server at play.example.net for free stuf")) <= 8
+    assert hamming(original, simhash("what did everyone build today, anything cool?")) > 8
+
+
+def test_fingerprint_window_matches_brute_force():
+    rng = random.Random(6)
+    window = FingerprintWindow(max_size=1000, window_seconds=1e9, max_distance=8)
+    base = rng.getrandbits(64)
+    fingerprints = []
+    for _ in range(300):
+        fingerprint = base
+        # few flipped bits, so they all share a band and the count is exact
+        for bit in rng.sample(range(64), rng.randint(0, 7)):
+            fingerprint ^= 1 << bit
+        if rng.random() < 0.3:
+            fingerprint = rng.getrandbits(64)
+        fingerprints.append(fingerprint)
+
+    for i, fingerprint in enumerate(fingerprints):
+        expected = sum(hamming(fingerprint, other) <= 7 for other in fingerprints[:i])
+        # all within 7 bits are found (8+ bits apart may or may not be)
+        found = window.count_similar(fingerprint, 0.0, 10 ** 9)
+        assert found >= expected
+        assert found <= sum(hamming(fingerprint, other) <= 8 for other in fingerprints[:i])
+        window.add(fingerprint, 0.0)
+
+
+def test_fingerprint_window_limit_and_expiry():
+    window = FingerprintWindow(max_size=4, window_seconds=10.0, max_distance=8)
+    for t, fingerprint in enumerate((42, 43, 40, 46)):
+        window.add(fingerprint, float(t))
+    assert len(window) == 4
+    # counting stops once the limit is reached
+    assert 2 <= window.count_similar(42, 3.0, limit=2) < 4
+    assert window.count_similar(42, 3.0, limit=100) == 4
+
+    # the oldest one is pushed out by the size limit
+    window.add(42, 4.0)
+    assert len(window) == 4
+    # and the rest by time
+    assert window.count_similar(42, 12.5, limit=100) == 2
+    assert window.count_similar(42, 100.0, limit=100) == 0
+    assert len(window) == 0
+    assert window._bands == {}
+
+
+def test_fingerprint_window_clear():
+    window = FingerprintWindow()
+    window.add(simhash("some message"), 0.0)
+    window.clear()
+    assert len(window) == 0
+    assert window.count_similar(simhash("some message"), 0.0, limit=10) == 0